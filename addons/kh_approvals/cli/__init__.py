@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+# Odoo loads the commands of addons that have a cli/ directory.
+from . import populate
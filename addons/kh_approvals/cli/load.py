@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Concurrent load driver for the approvals workflow, over JSON-RPC.
+
+    python3 addons/kh_approvals/cli/load.py --url http://localhost:8069 -d <db> \\
+        --manifest /tmp/kh_load.json --workers 32 --duration 120 \\
+        --mix submit=30,approve=40,reject=10,revise=20
+
+Replays submit, approve, reject and revise traffic as the users generated by
+`odoo-bin kh_approvals_populate` from many worker processes, then reports per
+action: throughput, latency percentiles (search + action, as a user would see
+it), serialization / lock failures and client-side retries.
+
+Standalone: standard library only, does not import Odoo.
+"""
+import argparse
+import http.client
+import json
+import random
+import sys
+import time
+import urllib.parse
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+ACTIONS = ("submit", "approve", "reject", "revise")
+# Server errors worth retrying: the transaction lost a race, not a business rule
+RETRYABLE = (
+    "SerializationFailure",
+    "TransactionRollbackError",
+    "LockNotAvailable",
+    "DeadlockDetected",
+)
+# Requests considered per pick, to spread workers over the queue
+PICK_WINDOW = 20
+
+
+class RpcError(Exception):
+    def __init__(self, error):
+        data = error.get("data") or {}
+        super().__init__(data.get("message") or error.get("message") or "RPC error")
+        self.name = data.get("name") or ""
+
+    @property
+    def retryable(self):
+        return any(name in self.name for name in RETRYABLE)
+
+
+class Client:
+    """Minimal JSON-RPC client on one keep-alive connection."""
+
+    def __init__(self, url, db, timeout=60):
+        parts = urllib.parse.urlsplit(url)
+        connection = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.conn = connection(parts.hostname, parts.port, timeout=timeout)
+        self.db = db
+        self.seq = 0
+
+    def call(self, service, method, *args):
+        self.seq += 1
+        body = json.dumps({
+            "jsonrpc": "2.0",
+            "method": "call",
+            "params": {"service": service, "method": method, "args": args},
+            "id": self.seq,
+        })
+        try:
+            self.conn.request("POST", "/jsonrpc", body, {"Content-Type": "application/json"})
+            reply = json.loads(self.conn.getresponse().read())
+        except (http.client.HTTPException, OSError):
+            self.conn.close()  # reopened by the next request
+            raise
+        if reply.get("error"):
+            raise RpcError(reply["error"])
+        return reply["result"]
+
+    def login(self, login, password):
+        return self.call("common", "login", self.db, login, password)
+
+    def execute(self, user, model, method, *args, **kwargs):
+        uid, password = user
+        return self.call("object", "execute_kw", self.db, uid, password, model, method, list(args), kwargs)
+
+
+# ----------------------------------------------------------------------------
+# Actions: return an outcome, "ok", "idle" (nothing to do) or "already_processed"
+# (approve/reject answered that another call decided or is deciding the request)
+# ----------------------------------------------------------------------------
+def _pick(client, user, domain):
+    ids = client.execute(user, "kh.approval.request", "search", domain, limit=PICK_WINDOW)
+    return random.choice(ids) if ids else False
+
+
+def do_submit(client, user, profile):
+    """Submit one of my drafts, or a new request."""
+    request_id = _pick(client, user, [("requester_id", "=", user[0]), ("state", "=", "draft")])
+    if not request_id:
+        request_id = client.execute(user, "kh.approval.request", "create", {
+            "title": "Load test %s" % random.randrange(10 ** 9),
+            "company_id": profile["company_id"],
+            "department_id": random.choice(profile["department_ids"]),
+            "amount": round(random.lognormvariate(6, 1.5), 2),
+        })
+    client.execute(user, "kh.approval.request", "action_submit", [request_id])
+    return "ok"
+
+
+def do_decide(method):
+    def action(client, user, profile):
+        request_id = _pick(client, user, [("state", "=", "in_review"), ("current_approver_ids", "in", [user[0]])])
+        if not request_id:
+            return "idle"
+        result = client.execute(user, "kh.approval.request", method, [request_id])
+        return "already_processed" if isinstance(result, dict) else "ok"
+    return action
+
+
+def do_revise(client, user, profile):
+    """Send one of my rejected requests back to draft."""
+    request_id = _pick(client, user, [("requester_id", "=", user[0]), ("state", "=", "rejected")])
+    if not request_id:
+        return "idle"
+    client.execute(user, "kh.approval.request", "action_revise_request", [request_id])
+    return "ok"
+
+
+HANDLERS = {
+    "submit": (do_submit, "requester"),
+    "approve": (do_decide("action_approve_request"), "approver"),
+    "reject": (do_decide("action_reject_request"), "approver"),
+    "revise": (do_revise, "requester"),
+}
+
+
+# ----------------------------------------------------------------------------
+# Worker
+# ----------------------------------------------------------------------------
+def worker(options):
+    """Run actions until the deadline; return [(action, outcome, seconds, failures, retries)]."""
+    index, args, profiles, weights = options
+    rng = random.Random(args.seed + index)
+    random.seed(args.seed + index)
+    client = Client(args.url, args.database, timeout=args.timeout)
+    users = {}  # login -> (uid, password)
+    samples = []
+    actions, cumulative = zip(*weights)
+    deadline = time.monotonic() + args.duration
+    while time.monotonic() < deadline:
+        action = rng.choices(actions, cum_weights=cumulative)[0]
+        handler, role = HANDLERS[action]
+        profile = rng.choice(profiles[role])
+        if profile["login"] not in users:
+            uid = client.login(profile["login"], args.password)
+            if not uid:
+                sys.exit("login failed for %s" % profile["login"])
+            users[profile["login"]] = (uid, args.password)
+        user = users[profile["login"]]
+
+        failures = retries = 0
+        start = time.perf_counter()
+        while True:
+            try:
+                outcome = handler(client, user, profile)
+            except RpcError as e:
+                if e.retryable:
+                    failures += 1
+                    if retries < args.max_retries:
+                        retries += 1
+                        time.sleep(rng.uniform(0, min(1.0, 0.05 * 2 ** retries)))
+                        continue
+                    outcome = "serialization"
+                else:
+                    # UserError & co: the request moved on (already decided, not my turn...)
+                    outcome = "user_error" if "odoo.exceptions" in e.name else "error"
+            except (http.client.HTTPException, OSError):
+                outcome = "error"
+            break
+        samples.append((action, outcome, time.perf_counter() - start, failures, retries))
+    return samples
+
+
+# ----------------------------------------------------------------------------
+# Report
+# ----------------------------------------------------------------------------
+def percentile(values, p):
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(p / 100.0 * len(values))) - 1))]
+
+
+def summarize(samples, duration):
+    stats = {}
+    by_action = defaultdict(list)
+    for sample in samples:
+        by_action[sample[0]].append(sample)
+    for action in ACTIONS:
+        rows = by_action.get(action, [])
+        outcomes = defaultdict(int)
+        for _action, outcome, _seconds, _failures, _retries in rows:
+            outcomes[outcome] += 1
+        latencies = sorted(seconds for _a, outcome, seconds, _f, _r in rows if outcome == "ok")
+        stats[action] = {
+            "ops": len(rows),
+            "ok": outcomes["ok"],
+            "ok_per_s": round(outcomes["ok"] / duration, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p90_ms": round(percentile(latencies, 90) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+            "max_ms": round((latencies[-1] if latencies else 0.0) * 1000, 1),
+            "idle": outcomes["idle"],
+            "already_processed": outcomes["already_processed"],
+            "user_error": outcomes["user_error"],
+            "serialization_failures": sum(row[3] for row in rows),
+            "retries": sum(row[4] for row in rows),
+            "gave_up": outcomes["serialization"],
+            "errors": outcomes["error"],
+        }
+    return stats
+
+
+def print_report(stats):
+    columns = ("ops", "ok", "ok_per_s", "p50_ms", "p90_ms", "p99_ms", "max_ms",
+               "idle", "already_processed", "user_error", "serialization_failures", "retries", "gave_up", "errors")
+    headers = ("ops", "ok", "ok/s", "p50 ms", "p90 ms", "p99 ms", "max ms",
+               "idle", "processed", "user err", "ser. fail", "retries", "gave up", "errors")
+    print("%-8s" % "action" + "".join("%10s" % h for h in headers))
+    for action, row in stats.items():
+        print("%-8s" % action + "".join("%10s" % row[c] for c in columns))
+
+
+def parse_mix(value):
+    weights = {}
+    for part in value.split(","):
+        action, _sep, weight = part.partition("=")
+        if action not in HANDLERS:
+            raise argparse.ArgumentTypeError("unknown action %r (one of %s)" % (action, ", ".join(ACTIONS)))
+        weights[action] = float(weight or 1)
+    return weights
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8069")
+    parser.add_argument("-d", "--database", required=True)
+    parser.add_argument("--manifest", required=True, help="JSON written by kh_approvals_populate --manifest")
+    parser.add_argument("--password", default="kh_load")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=60, help="seconds")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("submit=30,approve=40,reject=10,revise=20"))
+    parser.add_argument("--max-retries", type=int, default=3, help="client retries on serialization/lock failures")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    with open(args.manifest, encoding="utf-8") as f:
+        manifest = json.load(f)
+    profiles = defaultdict(list)
+    for user in manifest["users"]:
+        profiles[user["role"]].append(user)
+    cumulative, weights = 0.0, []
+    for action, weight in args.mix.items():
+        if weight > 0:
+            cumulative += weight
+            weights.append((action, cumulative))
+    if not weights:
+        parser.error("--mix has no positive weight")
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        samples = [
+            sample
+            for result in pool.map(worker, [(i, args, dict(profiles), weights) for i in range(args.workers)])
+            for sample in result
+        ]
+    stats = summarize(samples, args.duration)
+    print_report(stats)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"workers": args.workers, "duration": args.duration, "actions": stats}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic approval data for load tests: companies, departments, multi-step
+(partly parallel) rules, users and requests in every state.
+
+    odoo-bin kh_approvals_populate -c odoo.conf -d <db> --requests 250000 \\
+        --manifest /tmp/kh_load.json
+
+Requests are created, routed and moved to their final state a batch at a
+time (one create per batch, set-based writes, one commit per batch), without
+chatter notifications. The manifest lists the generated users for the load
+driver (cli/load.py); they all share --password.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import timedelta
+from random import Random
+
+from odoo import SUPERUSER_ID, api, fields
+from odoo.cli import Command
+from odoo.modules.registry import Registry
+from odoo.tools import config, split_every
+
+_logger = logging.getLogger(__name__)
+
+# Final state of the generated requests: (state, share)
+STATE_MIX = (
+    ("draft", 0.10),
+    ("in_review", 0.35),
+    ("approved", 0.25),
+    ("paid", 0.10),
+    ("rejected", 0.20),
+)
+
+
+class KhApprovalsPopulate(Command):
+    """Generate synthetic kh_approvals data for load testing"""
+    name = "kh_approvals_populate"
+
+    def run(self, cmdargs):
+        parser = argparse.ArgumentParser(
+            prog=f"{os.path.basename(sys.argv[0])} {self.name}",
+            description=self.__doc__,
+            epilog="Other options (-c, -d, --db_host...) are passed to the Odoo configuration.",
+        )
+        parser.add_argument("--companies", type=int, default=3)
+        parser.add_argument("--departments", type=int, default=5, help="per company")
+        parser.add_argument("--requesters", type=int, default=50, help="per company")
+        parser.add_argument("--approvers", type=int, default=20, help="per company")
+        parser.add_argument("--rules", type=int, default=3, help="per department")
+        parser.add_argument("--min-steps", type=int, default=2)
+        parser.add_argument("--max-steps", type=int, default=5)
+        parser.add_argument("--requests", type=int, default=10000)
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--days", type=int, default=365, help="submission dates spread over this many days")
+        parser.add_argument("--prefix", default="kh_load", help="login/name prefix (change it to run again)")
+        parser.add_argument("--password", default="kh_load")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--manifest", help="write the generated users to this JSON file")
+        args, odoo_args = parser.parse_known_args(cmdargs)
+        config.parse_config(odoo_args, setup_logging=True)
+
+        dbname = config["db_name"]
+        if isinstance(dbname, (list, tuple)):
+            dbname = dbname[0] if dbname else None
+        dbname = (dbname or "").split(",")[0]
+        if not dbname:
+            parser.error("a database is required (-d)")
+
+        registry = Registry(dbname)
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {
+                "tracking_disable": True,
+                "mail_create_nolog": True,
+                "mail_create_nosubscribe": True,
+                "mail_notrack": True,
+                "no_reset_password": True,
+            })
+            manifest = Populator(env, args).run()
+        if args.manifest:
+            with open(args.manifest, "w", encoding="utf-8") as f:
+                json.dump(dict(manifest, database=dbname), f, indent=1)
+            _logger.info("kh_approvals_populate: manifest written to %s", args.manifest)
+
+
+class Populator:
+    """Builds the data set described by the command line arguments."""
+
+    def __init__(self, env, args):
+        self.env = env
+        self.args = args
+        self.rng = Random(args.seed)
+
+    def _commit(self):
+        self.env.cr.commit()
+        self.env.invalidate_all()
+
+    def run(self):
+        start = time.perf_counter()
+        companies = self._companies()
+        departments = self._departments(companies)
+        requesters, approvers = self._users(companies)
+        rules = self._rules(departments, approvers)
+        self._commit()
+        self._requests(companies, departments, requesters, rules)
+        _logger.info("kh_approvals_populate: done in %.0fs", time.perf_counter() - start)
+        return {
+            "users": [
+                {
+                    "login": user.login,
+                    "id": user.id,
+                    "role": role,
+                    "company_id": user.company_id.id,
+                    "department_ids": departments[user.company_id.id].ids,
+                }
+                for role, users in (("requester", requesters), ("approver", approvers))
+                for company_users in users.values()
+                for user in company_users
+            ],
+        }
+
+    # -------------------------------------------------------------------------
+    # Master data
+    # -------------------------------------------------------------------------
+    def _companies(self):
+        return self.env["res.company"].create([
+            {"name": f"{self.args.prefix} Company {i:03d}"} for i in range(self.args.companies)
+        ])
+
+    def _departments(self, companies):
+        """{company id: departments}"""
+        departments = self.env["kh.approvals.department"].create([
+            {"name": f"{self.args.prefix} Department {c.id}-{i:02d}", "company_id": c.id}
+            for c in companies
+            for i in range(self.args.departments)
+        ])
+        by_company = defaultdict(lambda: self.env["kh.approvals.department"])
+        for department in departments:
+            by_company[department.company_id.id] |= department
+        return by_company
+
+    def _users(self, companies):
+        """({company id: requesters}, {company id: approvers}), all with the same password."""
+        group_user = self.env.ref("base.group_user")
+        Users = self.env["res.users"]
+        requesters, approvers = {}, {}
+        for company in companies:
+            for role, count, target in (
+                ("requester", self.args.requesters, requesters),
+                ("approver", self.args.approvers, approvers),
+            ):
+                target[company.id] = Users.create([{
+                    "name": f"{self.args.prefix} {role.title()} {company.id}-{i:04d}",
+                    "login": f"{self.args.prefix}_{role}_{company.id}_{i:04d}",
+                    "company_id": company.id,
+                    "company_ids": [(6, 0, company.ids)],
+                    "groups_id": [(6, 0, group_user.ids)],
+                } for i in range(count)])
+        # Hash once instead of once per user
+        user_ids = [user.id for users in (*requesters.values(), *approvers.values()) for user in users]
+        self.env.cr.execute(
+            "UPDATE res_users SET password = %s WHERE id = ANY(%s)",
+            [Users._crypt_context().hash(self.args.password), user_ids],
+        )
+        return requesters, approvers
+
+    def _rules(self, departments, approvers):
+        """{department id: [rule, ...]}: rising min_amount, 1 in 4 with a parallel 'any' stage."""
+        args, rng = self.args, self.rng
+        vals_list = []
+        for company_id, company_departments in departments.items():
+            pool = approvers[company_id]
+            currency_id = self.env["res.company"].browse(company_id).currency_id.id
+            for department in company_departments:
+                for i in range(args.rules):
+                    size = min(rng.randint(args.min_steps, args.max_steps), len(pool))
+                    vals_list.append({
+                        "name": f"{args.prefix} Rule {department.id}-{i}",
+                        "company_id": company_id,
+                        "department_id": department.id,
+                        "min_amount": 0 if i == 0 else 10 ** (i + 2),
+                        "currency_id": currency_id,
+                        "step_ids": [
+                            (0, 0, {"sequence": 10 * (n + 1), "approver_id": approver.id})
+                            for n, approver in enumerate(rng.sample(list(pool), size))
+                        ],
+                    })
+        rules = self.env["kh.approval.rule"].create(vals_list)
+
+        parallel = rules.filtered(lambda r: r.id % 4 == 0 and len(r.step_ids) >= 3)
+        stages = self.env["kh.approval.rule.stage"].create([
+            {"rule_id": rule.id, "name": "Parallel review", "sequence": 15, "quorum": "any"}
+            for rule in parallel
+        ])
+        for rule, stage in zip(parallel, stages):
+            # Step writes recompile the rule's route
+            rule.step_ids.sorted("sequence")[1:3].write({"stage_id": stage.id})
+
+        by_department = defaultdict(list)
+        for rule in rules:
+            by_department[rule.department_id.id].append(rule)
+        return by_department
+
+    # -------------------------------------------------------------------------
+    # Requests
+    # -------------------------------------------------------------------------
+    def _pick_state(self):
+        roll, total = self.rng.random(), 0.0
+        for state, share in STATE_MIX:
+            total += share
+            if roll < total:
+                return state
+        return STATE_MIX[-1][0]
+
+    def _requests(self, companies, departments, requesters, rules):
+        args, rng = self.args, self.rng
+        Request = self.env["kh.approval.request"]
+        now = fields.Datetime.now()
+        created = lines = 0
+        for batch in split_every(args.batch_size, range(args.requests), list):
+            vals_list, targets = [], []
+            for n in batch:
+                company = companies[n % len(companies)]
+                department = rng.choice(departments[company.id])
+                rule_index = rng.randrange(len(rules[department.id]))
+                rule = rules[department.id][rule_index]
+                vals_list.append({
+                    "title": f"{args.prefix} request {n}",
+                    "company_id": company.id,
+                    "department_id": department.id,
+                    "rule_id": rule.id,
+                    "requester_id": rng.choice(requesters[company.id]).id,
+                    "amount": round(rule.min_amount + rng.lognormvariate(6, 1.5), 2),
+                    "currency_id": company.currency_id.id,
+                })
+                targets.append(self._pick_state())
+            requests = Request.create(vals_list)
+            lines += self._advance(requests, targets, now - timedelta(days=rng.uniform(0, args.days)))
+            created += len(requests)
+            self._commit()
+            _logger.info("kh_approvals_populate: %s/%s requests, %s steps", created, args.requests, lines)
+
+    def _advance(self, requests, targets, when):
+        """Move freshly created drafts to their target state, set-based and without notifications."""
+        Request = self.env["kh.approval.request"]
+        by_state = defaultdict(lambda: Request)
+        for rec, state in zip(requests, targets):
+            by_state[state] |= rec
+        submitted = requests - by_state["draft"]
+        if not submitted:
+            return 0
+        submitted._build_approval_lines()
+        submitted.write({"state": "in_review", "submitted_on": when})
+
+        decided = when + timedelta(hours=2)
+        first = submitted._active_lines()
+        first.write({"pending_since": when})
+        first.filtered(lambda l: l.request_id in by_state["rejected"]).write({
+            "state": "rejected", "decided_on": decided,
+        })
+        closed = by_state["approved"] | by_state["paid"]
+        closed.approval_line_ids.write({
+            "state": "approved", "pending_since": when, "decided_on": decided,
+        })
+        # closed_on as the workflow sets it: on rejection, on payment, or on
+        # approval when there is nothing to pay
+        by_state["rejected"].write({"state": "rejected", "closed_on": decided})
+        no_payment = by_state["approved"].filtered(lambda r: r.amount <= 0)
+        (closed - no_payment).write({"state": "approved"})
+        no_payment.write({"state": "approved", "closed_on": decided})
+        by_state["paid"].write({"payment_state": "paid", "closed_on": when + timedelta(days=1)})
+        by_state["in_review"]._notify_first_pending()
+        return len(submitted.approval_line_ids)
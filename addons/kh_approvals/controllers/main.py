@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+import csv
+import io
+import json
+import tempfile
+
+from werkzeug.exceptions import BadRequest, Forbidden
+
+from odoo import api, fields, http
+from odoo.http import content_disposition, request
+from odoo.tools import split_every
+from odoo.tools.misc import xlsxwriter
+
+# Requests created (and submitted) per savepoint by the ingestion endpoints
+INGEST_CHUNK_SIZE = 100
+# Rows buffered before a CSV block is sent
+EXPORT_CSV_BLOCK = 1000
+XLSX_MAX_ROWS = 1048576
+
+
+class KhApprovalsController(http.Controller):
+
+    @http.route("/kh_approvals/dashboard", type="json", auth="user")
+    def dashboard(self):
+        """Queue sizes for the current user (+ aggregates for managers), from kh.approval.counter."""
+        return request.env["kh.approval.counter"]._dashboard_data()
+
+    # -------------------------------------------------------------------------
+    # Bulk ingestion
+    # -------------------------------------------------------------------------
+    def _ingest_chunks(self, items, submit):
+        """Feed items to kh.approval.request._ingest chunk by chunk, dropping the cache in between."""
+        Request = request.env["kh.approval.request"]
+        for chunk in split_every(INGEST_CHUNK_SIZE, items, list):
+            yield from Request._ingest(chunk, submit=submit)
+            request.env.flush_all()
+            request.env.invalidate_all()
+
+    @http.route("/kh_approvals/ingest", type="json", auth="user", methods=["POST"])
+    def ingest(self, requests=None, submit=False):
+        """
+        Create requests in bulk.
+        params: {"requests": [{"idempotency_key": ..., "title": ..., "amount": ..., ...}],
+                 "submit": true}
+        Returns {"results": [{"idempotency_key", "status": created|exists|error, "id", "name", "state", "error"}]}.
+        """
+        return {"results": list(self._ingest_chunks(requests or [], bool(submit)))}
+
+    @http.route("/kh_approvals/ingest/ndjson", type="http", auth="bearer", methods=["POST"], csrf=False)
+    def ingest_ndjson(self, submit=None, **kwargs):
+        """
+        NDJSON variant: one request object per line, read from the body as a
+        stream (?submit=1 to submit them). Answers NDJSON, one result per
+        non-empty input line, each tagged with its line number.
+
+        Authenticated with an API key ("Authorization: Bearer <key>") only:
+        without a CSRF token, a session cookie alone is not accepted.
+        """
+        if not request.httprequest.headers.get("Authorization"):
+            raise Forbidden()
+        submit = submit in ("1", "true", "True")
+        line_numbers = []  # input line of each parsed item, in order
+        results = {}
+
+        def items():
+            for line_no, raw in enumerate(request.httprequest.stream, 1):
+                if not raw.strip():
+                    continue
+                try:
+                    item = json.loads(raw)
+                except ValueError as e:
+                    results[line_no] = {"line": line_no, "status": "error", "error": str(e)}
+                    continue
+                line_numbers.append(line_no)
+                yield item
+
+        # A chunk is fully read before it is ingested, so result i belongs to line_numbers[i]
+        for index, result in enumerate(self._ingest_chunks(items(), submit)):
+            results[line_numbers[index]] = dict(result, line=line_numbers[index])
+
+        body = "".join(json.dumps(results[line_no]) + "\n" for line_no in sorted(results))
+        return request.make_response(body, headers=[("Content-Type", "application/x-ndjson")])
+
+    # -------------------------------------------------------------------------
+    # History export
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _csv_blocks(rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if count % EXPORT_CSV_BLOCK == 0:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode()
+
+    @staticmethod
+    def _xlsx_blocks(rows, block_size=65536):
+        """xlsxwriter in constant_memory mode, spilled to a temporary file, then sent in blocks."""
+        header = next(rows)
+        with tempfile.TemporaryFile() as tmp:
+            workbook = xlsxwriter.Workbook(tmp, {"constant_memory": True})
+            sheet, row_index = None, XLSX_MAX_ROWS
+            for row in rows:
+                if row_index == XLSX_MAX_ROWS:
+                    sheet = workbook.add_worksheet()
+                    sheet.write_row(0, 0, header)
+                    row_index = 1
+                sheet.write_row(row_index, 0, row)
+                row_index += 1
+            if sheet is None:
+                workbook.add_worksheet().write_row(0, 0, header)
+            workbook.close()
+            tmp.seek(0)
+            while block := tmp.read(block_size):
+                yield block
+
+    @http.route("/kh_approvals/export", type="http", auth="user", methods=["GET"])
+    def export_history(self, file_format="csv", domain="[]", **kwargs):
+        """
+        Stream requests with their steps flattened (one row per step) as CSV or XLSX.
+        domain: JSON search domain on kh.approval.request; record rules still apply.
+        """
+        if file_format not in ("csv", "xlsx"):
+            raise BadRequest("file_format must be csv or xlsx")
+        try:
+            domain = json.loads(domain)
+        except ValueError:
+            raise BadRequest("domain must be a JSON list")
+        request.env["kh.approval.request"].check_access("read")
+
+        # The response is iterated after the request cursor is closed: read with our own.
+        registry, uid, context = request.env.registry, request.env.uid, dict(request.env.context)
+
+        def rows():
+            with registry.cursor() as cr:
+                Request = api.Environment(cr, uid, context)["kh.approval.request"]
+                yield Request._export_history_header()
+                yield from Request._export_history_rows(domain)
+
+        filename = "approval_history_%s.%s" % (fields.Date.to_string(fields.Date.today()), file_format)
+        if file_format == "csv":
+            body, mimetype = self._csv_blocks(rows()), "text/csv;charset=utf-8"
+        else:
+            body, mimetype = self._xlsx_blocks(rows()), (
+                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
+        return request.make_response(body, headers=[
+            ("Content-Type", mimetype),
+            ("Content-Disposition", content_disposition(filename)),
+        ])
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""Backfill kh.approval.line pending_since / decided_on for existing history."""
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    # Decided steps: the last write on a decided line is its decision.
+    cr.execute("""
+        UPDATE kh_approval_line
+           SET decided_on = write_date
+         WHERE decided_on IS NULL
+           AND state IN ('approved', 'rejected')
+    """)
+    # A step becomes pending when the request is submitted (first step)
+    # or when the previous step is decided.
+    cr.execute("""
+        WITH ordered AS (
+            SELECT l.id,
+                   COALESCE(
+                       LAG(l.decided_on) OVER (PARTITION BY l.request_id ORDER BY l.id),
+                       r.submitted_on
+                   ) AS pending_since
+              FROM kh_approval_line l
+              JOIN kh_approval_request r ON r.id = l.request_id
+             WHERE r.state != 'draft'
+        )
+        UPDATE kh_approval_line l
+           SET pending_since = o.pending_since
+          FROM ordered o
+         WHERE o.id = l.id
+           AND l.pending_since IS NULL
+           AND (l.state != 'pending' OR EXISTS (
+                   SELECT 1 FROM kh_approval_request r
+                    WHERE r.id = l.request_id AND r.pending_line_id = l.id
+               ))
+    """)
+    cr.execute("REFRESH MATERIALIZED VIEW kh_approval_cycle_stats")
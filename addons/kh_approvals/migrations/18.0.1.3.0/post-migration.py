@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+"""Recompile every rule: routes now carry each step's stage and quorum."""
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env["kh.approval.rule"].with_context(active_test=False).search([])._compile_route()
+    env.registry.clear_cache()
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""Existing steps ran strictly in sequence: give each one its own stage before the ORM adds the columns."""
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    cr.execute("ALTER TABLE kh_approval_line ADD COLUMN IF NOT EXISTS stage integer")
+    cr.execute("ALTER TABLE kh_approval_line ADD COLUMN IF NOT EXISTS stage_quorum integer")
+    cr.execute("""
+        WITH ordered AS (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY request_id ORDER BY id) AS stage
+              FROM kh_approval_line
+        )
+        UPDATE kh_approval_line l
+           SET stage = o.stage,
+               stage_quorum = 1
+          FROM ordered o
+         WHERE o.id = l.id
+           AND l.stage IS NULL
+    """)
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""Convert the remaining (foreign currency) requests with the ORM, at their submission date rate."""
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    cr.execute("SELECT id FROM kh_approval_request WHERE amount_company_currency IS NULL")
+    Request = env["kh.approval.request"].with_context(active_test=False)
+    requests = Request.browse([row[0] for row in cr.fetchall()])
+    if requests:
+        env.add_to_compute(Request._fields["amount_company_currency"], requests)
+        requests.flush_recordset(["amount_company_currency"])
+    # Counters now sum company-currency amounts
+    env["kh.approval.counter"]._rebuild()
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""Create amount_company_currency before the ORM does, so requests already in the company's currency are filled in SQL."""
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    cr.execute("ALTER TABLE kh_approval_request ADD COLUMN IF NOT EXISTS amount_company_currency numeric")
+    cr.execute("""
+        UPDATE kh_approval_request r
+           SET amount_company_currency = COALESCE(r.amount, 0)
+          FROM res_company c
+         WHERE c.id = r.company_id
+           AND r.currency_id = c.currency_id
+           AND r.amount_company_currency IS NULL
+    """)
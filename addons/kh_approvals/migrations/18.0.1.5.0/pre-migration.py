@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""
+Create closed_on and kh_approval_line.active before the ORM does: closed
+requests get the date of their last decision (their last change when paid
+or undecided), and existing steps stay active.
+"""
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    cr.execute("ALTER TABLE kh_approval_line ADD COLUMN IF NOT EXISTS active boolean DEFAULT true")
+    cr.execute("ALTER TABLE kh_approval_line ALTER COLUMN active DROP DEFAULT")
+    cr.execute("ALTER TABLE kh_approval_request ADD COLUMN IF NOT EXISTS closed_on timestamp")
+    cr.execute("""
+        UPDATE kh_approval_request r
+           SET closed_on = CASE
+                   WHEN r.payment_state = 'paid' THEN r.write_date
+                   ELSE COALESCE(
+                       (SELECT MAX(l.decided_on) FROM kh_approval_line l WHERE l.request_id = r.id),
+                       r.write_date
+                   )
+               END
+         WHERE r.closed_on IS NULL
+           AND (r.state = 'rejected'
+                OR (r.state = 'approved' AND (r.payment_state = 'paid' OR COALESCE(r.amount, 0) <= 0)))
+    """)
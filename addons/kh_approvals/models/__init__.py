@@ -1,4 +1,10 @@
 from . import approval_request
 from . import department
 from . import rule_step   # <-- add this line
-from . import mail_activity_guard   # <-- add this line
\ No newline at end of file
+from . import mail_activity_guard   # <-- add this line
+from . import notify_log
+from . import dashboard_counter
+from . import outbox
+from . import rule_version
+from . import digest
+from . import perf_log
@@ -1,6 +1,19 @@
 # -*- coding: utf-8 -*-
-from odoo import api, fields, models, _
+from collections import defaultdict, namedtuple
+
+from psycopg2.errors import LockNotAvailable, SerializationFailure
+
+from odoo import Command, api, fields, models, tools, _
 from odoo.exceptions import UserError, AccessError
+from odoo.tools.sql import create_index
+
+from .perf_log import instrumented
+
+# Immutable snapshot of a rule and its ordered approvers, safe to keep in the ormcache.
+# steps: tuple of (approver_id, step_name, stage, quorum) in approval order, steps without
+# approver skipped. Steps sharing a stage number are pending together; quorum is the number
+# of approvals that completes their stage.
+RuleRoute = namedtuple("RuleRoute", "id version_id company_id department_id min_amount currency_id steps")
 
 # ============================================================================
 # Approval Request
@@ -10,6 +23,13 @@ class KhApprovalRequest(models.Model):
     _description = "Khales Approval Request"
     _inherit = ["mail.thread", "mail.activity.mixin"]
     _check_company_auto = True
+    _sql_constraints = [
+        ("ingest_key_uniq", "unique(ingest_key)", "This ingestion key was already used by another request."),
+    ]
+
+    # Request fields accepted by the ingestion API
+    _INGEST_FIELDS = ("title", "company_id", "department_id", "rule_id", "amount", "currency_id")
+
     # -------------------------------------------------------------------------
     # Fields
     # -------------------------------------------------------------------------
@@ -37,6 +57,7 @@ class KhApprovalRequest(models.Model):
         "res.users",
         string="Requester",
         default=lambda self: self.env.user.id,
+        index=True,
         tracking=True,
     )
 
@@ -48,6 +69,19 @@ class KhApprovalRequest(models.Model):
         required=True,
     )
 
+    # Amount in the company's currency at the submission date rate (today's while
+    # in draft): rule thresholds and grouped totals compare/sum it in SQL.
+    company_currency_id = fields.Many2one(related="company_id.currency_id", string="Company Currency")
+    amount_company_currency = fields.Monetary(
+        string="Amount (Company Currency)",
+        currency_field="company_currency_id",
+        compute="_compute_amount_company_currency",
+        store=True,
+        index=True,
+        compute_sudo=True,
+        copy=False,
+    )
+
     state = fields.Selection(
         [
             ("draft", "Draft"),
@@ -77,6 +111,14 @@ class KhApprovalRequest(models.Model):
     last_revised_on = fields.Datetime(readonly=True)
     submitted_on = fields.Datetime(string="Submitted On", readonly=True, tracking=True)
 
+    # Archival tier (see _cron_archive): closed requests leave the default views,
+    # their steps are kept as a snapshot and the line rows are archived with them.
+    active = fields.Boolean(default=True, index=True)
+    # Rejected, approved without amount, or paid: the archival age counts from here
+    closed_on = fields.Datetime(string="Closed On", readonly=True, copy=False, index=True)
+    archived_on = fields.Datetime(string="Archived On", readonly=True, copy=False)
+    archived_steps = fields.Json(string="Archived Steps", readonly=True, copy=False)
+
     # Single rule selector (rule defines company/department/approver sequence)
     rule_id = fields.Many2one(
         "kh.approval.rule",
@@ -86,73 +128,319 @@ class KhApprovalRequest(models.Model):
         tracking=True,
     )
 
+    # Compiled rule version the current steps were generated from (audit)
+    rule_version_id = fields.Many2one(
+        "kh.approval.rule.version",
+        string="Rule Version",
+        readonly=True,
+        copy=False,
+        tracking=True,
+    )
+
+    # Idempotency key of requests pushed through /kh_approvals/ingest
+    ingest_key = fields.Char(string="Ingestion Key", readonly=True, copy=False, index=True)
+
     # Concrete steps generated from the rule's step_ids
     approval_line_ids = fields.One2many(
         "kh.approval.line", "request_id", string="Approval Steps", copy=False
     )
 
-    # Always-visible, read-only HTML snapshot of all steps (built with sudo)
+    # Denormalized approver membership (record rules filter on this, not on the lines)
+    approver_user_ids = fields.Many2many(
+        "res.users",
+        "kh_approval_request_approver_rel",
+        "request_id",
+        "user_id",
+        string="Approvers",
+        compute="_compute_approver_user_ids",
+        store=True,
+        compute_sudo=True,
+        copy=False,
+    )
+
+    # Always-visible, read-only HTML snapshot of all steps (built with sudo).
+    # Stored: only re-rendered when a step changes, not on every read/export.
     steps_overview_html = fields.Html(
         string="Approval Steps (All Approvers)",
         compute="_compute_steps_overview_html",
-        store=False,
+        store=True,
+        compute_sudo=True,
+        copy=False,
     )
 
-    # Helper fields for UI logic
+    # Current stage / approvers (stored + indexed so "To Approve" is one lookup).
+    # All pending steps of the current stage are active at once; pending_line_id
+    # and current_approver_id are the first of them (display); the dashboard
+    # counters count the request for each of current_approver_ids.
+    current_stage = fields.Integer(
+        string="Current Stage",
+        compute="_compute_pending_line",
+        store=True,
+        readonly=True,
+        copy=False,
+    )
+    current_approver_ids = fields.Many2many(
+        "res.users",
+        "kh_approval_request_current_approver_rel",
+        "request_id",
+        "user_id",
+        string="Current Approvers",
+        compute="_compute_pending_line",
+        store=True,
+        readonly=True,
+        copy=False,
+    )
     pending_line_id = fields.Many2one(
-        "kh.approval.line", compute="_compute_pending_line", store=False
+        "kh.approval.line",
+        string="Current Step",
+        compute="_compute_pending_line",
+        store=True,
+        index=True,
+        readonly=True,
+        copy=False,
+    )
+    current_approver_id = fields.Many2one(
+        "res.users",
+        string="Current Approver",
+        compute="_compute_pending_line",
+        store=True,
+        index=True,
+        readonly=True,
+        copy=False,
     )
+    # Helper field for UI logic
     is_current_user_approver = fields.Boolean(
-        compute="_compute_pending_line", store=False
+        compute="_compute_is_current_user_approver", store=False
     )
 
     # -------------------------------------------------------------------------
     # Computes
     # -------------------------------------------------------------------------
-    @api.depends("approval_line_ids.state", "approval_line_ids.approver_id")
+    @api.depends("state", "approval_line_ids.state", "approval_line_ids.approver_id", "approval_line_ids.stage")
     def _compute_pending_line(self):
+        """Lowest stage with pending steps of a request under review, and its pending steps."""
+        for rec in self:
+            lines = rec.env["kh.approval.line"]
+            if rec.state == "in_review":
+                pending = rec.approval_line_ids.filtered(lambda l: l.state == "pending")
+                if pending:
+                    stage = min(pending.mapped("stage"))
+                    lines = pending.filtered(lambda l: l.stage == stage)
+            rec.current_stage = lines[:1].stage
+            rec.pending_line_id = lines[:1]
+            rec.current_approver_id = lines[:1].approver_id
+            rec.current_approver_ids = lines.approver_id
+
+    @api.depends("amount", "currency_id", "company_id", "submitted_on")
+    def _compute_amount_company_currency(self):
+        for rec in self:
+            rec.amount_company_currency = rec._to_company_currency(
+                rec.amount, rec.currency_id.id, rec.company_id.id, rec.submitted_on,
+            )
+
+    @api.depends("approval_line_ids.approver_id", "approval_line_ids.escalated_from_id", "archived_steps")
+    def _compute_approver_user_ids(self):
         for rec in self:
-            line = rec.approval_line_ids.filtered(lambda l: l.state == "pending")[:1]
-            rec.pending_line_id = line.id if line else False
-            rec.is_current_user_approver = bool(
-                line and line.approver_id.id == rec.env.user.id
+            # Archived requests stay readable by their approvers, escalated steps by the original one
+            archived_ids = [step["approver_id"] for step in rec.archived_steps or [] if step.get("approver_id")]
+            rec.approver_user_ids = (
+                rec.approval_line_ids.approver_id
+                | rec.approval_line_ids.escalated_from_id
+                | rec.env["res.users"].browse(archived_ids)
             )
 
+    @api.depends("current_approver_ids")
+    @api.depends_context("uid")
+    def _compute_is_current_user_approver(self):
+        for rec in self:
+            rec.is_current_user_approver = rec.env.uid in rec.current_approver_ids.ids
+
     # HTML snapshot builder (uses sudo so approvers always see the full sequence)
+    @api.depends(
+        "approval_line_ids.name",
+        "approval_line_ids.state",
+        "approval_line_ids.required",
+        "approval_line_ids.note",
+        "approval_line_ids.approver_id",
+        "approval_line_ids.approver_id.name",
+        "approval_line_ids.stage",
+        "approval_line_ids.stage_quorum",
+        "archived_steps",
+    )
     def _compute_steps_overview_html(self):
+        # Prefetch the lines and approver names of the whole batch in one read
+        self.sudo().approval_line_ids.mapped("approver_id.name")
+        qweb = self.env['ir.qweb']
         for rec in self:
-            lines = rec.sudo().approval_line_ids.sorted('id')
-            if lines:
-                rec.steps_overview_html = self.env['ir.qweb']._render(
+            # Archived requests keep their steps as a snapshot only
+            steps = rec.sudo().approval_line_ids.sorted('id')._snapshot() or rec.archived_steps
+            if steps:
+                # stage -> number of steps, to show "1 of 3" on parallel stages
+                stage_sizes = defaultdict(int)
+                for step in steps:
+                    stage_sizes[step["stage"]] += 1
+                rec.steps_overview_html = qweb._render(
                     'kh_approvals.steps_overview_template',
-                    {'lines': lines}
+                    {'lines': steps, 'stage_sizes': stage_sizes}
                 )
             else:
                 rec.steps_overview_html = "<i>No approval steps.</i>"
+
+    def init(self):
+        # Hot paths only ever look at live requests
+        create_index(
+            self.env.cr,
+            "kh_approval_request_active_requester_idx",
+            self._table,
+            ["requester_id", "state"],
+            where="active",
+        )
+        create_index(
+            self.env.cr,
+            "kh_approval_request_active_company_idx",
+            self._table,
+            ["company_id", "state"],
+            where="active",
+        )
+
     def _critical_fields(self):
         """Fields that, if changed, should trigger a new approval cycle."""
         return {'title', 'amount', 'currency_id', 'company_id', 'department_id', 'rule_id'}
 
+    def _counter_fields(self):
+        """Fields that move a request between dashboard counters (kh.approval.counter)."""
+        # submitted_on: the company-currency amount is converted at the submission date
+        return {'amount', 'currency_id', 'company_id', 'department_id', 'state', 'payment_state', 'submitted_on'}
+
+    # -------------------------------------------------------------------------
+    # Currency conversion
+    # -------------------------------------------------------------------------
+    @api.model
+    def _company_rates(self, company, date, currencies):
+        """
+        {currency id: rate} for a company and date, cached for the transaction:
+        res.currency._get_rates queries on every call, so a batch compute would
+        otherwise run one query per request.
+        """
+        cache = self.env.cr.precommit.data.setdefault("kh_approvals.currency_rates", {})
+        rates = cache.setdefault((company.id, date), {})
+        missing = currencies.filtered(lambda c: c.id not in rates)
+        if missing:
+            rates.update(missing._get_rates(company, date))
+        return rates
+
+    @api.model
+    def _to_company_currency(self, amount, currency_id, company_id, date=None):
+        """amount in currency_id, converted to company_id's currency at date (default today)."""
+        company = self.env["res.company"].sudo().browse(company_id) if company_id else self.env.company
+        target = company.currency_id
+        if not amount or not currency_id or currency_id == target.id:
+            return amount or 0.0
+        date = fields.Date.to_date(date) or fields.Date.context_today(self)
+        currency = self.env["res.currency"].sudo().browse(currency_id)
+        rates = self._company_rates(company, date, currency | target)
+        return target.round(amount * rates[target.id] / rates[currency.id])
+
     # -------------------------------------------------------------------------
     # ORM overrides
     # -------------------------------------------------------------------------
     @api.model_create_multi
     def create(self, vals_list):
-        """Assign company, department (from rule if empty), and company-scoped name/sequence."""
+        """
+        Assign company, rule (resolved if empty), department (from rule if empty),
+        and company-scoped name/sequence.
+        """
+        Rule = self.env["kh.approval.rule"]
+        # If name is default "New", assign a sequence number (reserved per company in one go)
+        to_number = defaultdict(list)
         for vals in vals_list:
             vals.setdefault("company_id", self.env.company.id)
- 
-            # If name is default "New", assign a sequence number
             if vals.get("name", _("New")) == _("New"):
-                seq = self.env["ir.sequence"].with_context(
-                    force_company=vals["company_id"]
-                ).next_by_code("kh.approval.request")
-                vals["name"] = seq or _("New")
+                to_number[vals["company_id"]].append(vals)
+        for company_id, company_vals in to_number.items():
+            names = self._reserve_names(company_id, len(company_vals))
+            for vals, name in zip(company_vals, names):
+                vals["name"] = name or _("New")
+
+        for vals in vals_list:
+            # auto-pick the best matching rule if left empty
+            if not vals.get("rule_id"):
+                route = Rule._resolve_route(
+                    vals["company_id"], vals.get("department_id"), self._to_company_currency(
+                        vals.get("amount"), vals.get("currency_id"), vals["company_id"],
+                    ),
+                )
+                if route:
+                    vals["rule_id"] = route.id
             # auto-pick department from chosen rule if left empty
             if vals.get("rule_id") and not vals.get("department_id"):
-                rule = self.env["kh.approval.rule"].browse(vals["rule_id"])
-                vals["department_id"] = rule.department_id.id
-        return super().create(vals_list)
+                route = Rule._get_route(vals["rule_id"], vals["company_id"])
+                vals["department_id"] = route.department_id
+        records = super().create(vals_list)
+        Counter = self.env["kh.approval.counter"]
+        Counter._apply_delta({}, Counter._snapshot(records))
+        return records
+
+    @api.model
+    def _reserve_names(self, company_id, count):
+        """
+        Reserve `count` request numbers for a company in one round trip.
+
+        Picks the same sequence as next_by_code (company-specific first, then
+        global) and honours its prefix/suffix, date ranges and implementation:
+        'standard' draws from the PostgreSQL sequence, so concurrent workers
+        never get the same number; 'no_gap' locks the counter row like
+        next_by_code does and moves it by `count` steps at once.
+        """
+        if count <= 0:
+            return []
+        cr = self.env.cr
+        seq = self.env["ir.sequence"].sudo().with_company(company_id).search(
+            [("code", "=", "kh.approval.request"), ("company_id", "in", [company_id, False])],
+            order="company_id",
+            limit=1,
+        )
+        if not seq:
+            return [False] * count
+
+        counter, pg_sequence = seq, "ir_sequence_%03d" % seq.id
+        if seq.use_date_range:
+            today = self.env.context.get("ir_sequence_date") or fields.Date.today()
+            date_range = self.env["ir.sequence.date_range"].sudo().search(
+                [("sequence_id", "=", seq.id), ("date_from", "<=", today), ("date_to", ">=", today)],
+                limit=1,
+            ) or seq._create_date_range_seq(today)
+            counter, pg_sequence = date_range, "%s_%03d" % (pg_sequence, date_range.id)
+            seq = seq.with_context(ir_sequence_date_range=date_range.date_from)
+
+        if seq.implementation == "standard":
+            cr.execute("SELECT nextval(%s) FROM generate_series(1, %s)", [pg_sequence, count])
+            numbers = [row[0] for row in cr.fetchall()]
+        else:
+            counter.flush_recordset(["number_next"])
+            cr.execute(
+                f"SELECT number_next FROM {counter._table} WHERE id = %s FOR UPDATE NOWAIT",
+                [counter.id],
+            )
+            start = cr.fetchone()[0]
+            cr.execute(
+                f"UPDATE {counter._table} SET number_next = number_next + %s WHERE id = %s",
+                [seq.number_increment * count, counter.id],
+            )
+            counter.invalidate_recordset(["number_next"])
+            numbers = [start + i * seq.number_increment for i in range(count)]
+        return [seq.get_next_char(number) for number in numbers]
+
+    @api.onchange("company_id", "department_id", "amount", "currency_id")
+    def _onchange_resolve_rule(self):
+        """Suggest the best matching rule while the requester fills in a draft."""
+        if self.state == "draft" and not self.rule_id and self.company_id:
+            route = self.env["kh.approval.rule"]._resolve_route(
+                self.company_id.id, self.department_id.id,
+                self._to_company_currency(self.amount, self.currency_id.id, self.company_id.id),
+            )
+            if route:
+                self.rule_id = route.id
 
     def unlink(self):
         """
@@ -164,7 +452,11 @@ class KhApprovalRequest(models.Model):
                 raise AccessError(_("Only the requester can delete this request."))
             if rec.state not in ("draft", "rejected"):
                 raise UserError(_("You can delete only Draft or Rejected requests."))
-        return super().unlink()
+        Counter = self.env["kh.approval.counter"]
+        before = Counter._snapshot(self)
+        res = super().unlink()
+        Counter._apply_delta(before, {})
+        return res
 
     def write(self, vals):
         """
@@ -177,7 +469,13 @@ class KhApprovalRequest(models.Model):
                     if not self.env.context.get('kh_allow_write_outside_draft'):
                         raise UserError(_("You cannot edit request details after submission. "
                                           "Use 'Edit Request' to return to Draft, edit, and re-submit."))
-        return super().write(vals)
+        if not self._counter_fields().intersection(vals.keys()):
+            return super().write(vals)
+        Counter = self.env["kh.approval.counter"]
+        before = Counter._snapshot(self)
+        res = super().write(vals)
+        Counter._apply_delta(before, Counter._snapshot(self))
+        return res
 
     # -------------------------------------------------------------------------
     # Helpers - Links
@@ -194,8 +492,11 @@ class KhApprovalRequest(models.Model):
         """
         Post an INTERNAL NOTE only (no email, no auto-subscribe).
         Appears in chatter & Discuss/Inbox; safe on servers without SMTP.
+        On several requests, the same note is posted on each in one batch.
         """
-        if partner_ids:
+        if len(self) > 1:
+            self._post_note_batch(body_html, partner_ids)
+        elif partner_ids:
             self.message_notify(
                 partner_ids=partner_ids,
                 body=body_html,
@@ -214,6 +515,36 @@ class KhApprovalRequest(models.Model):
                 subtype_xmlid="mail.mt_note",
             )
 
+    def _post_note_batch(self, body_html, partner_ids=None):
+        """Same note on every request: one message create, one Inbox notification create."""
+        messages = self.sudo()._message_log_batch(
+            bodies={rec.id: body_html for rec in self},
+            message_type="comment",
+        )
+        if not partner_ids:
+            return
+        messages.write({"partner_ids": [Command.link(pid) for pid in partner_ids]})
+        self.env["mail.notification"].sudo().create([
+            {
+                "mail_message_id": message.id,
+                "res_partner_id": partner_id,
+                "notification_type": "inbox",
+                "is_read": False,
+            }
+            for message in messages
+            for partner_id in partner_ids
+        ])
+
+    def _note_to_requesters(self, body_html):
+        """Post the same note on every request, pinging its requester: one batched call per requester."""
+        by_requester = defaultdict(lambda: self.browse())
+        for rec in self:
+            by_requester[rec.requester_id.partner_id.id] |= rec
+        self._dispatch("_post_note", [
+            (requests, {"body_html": body_html, "partner_ids": [partner_id]})
+            for partner_id, requests in by_requester.items()
+        ])
+
     def _notify_partner(self, partner, body_html, subject=None):
         """Send an Inbox notification FROM this document (not a user DM)."""
         self.ensure_one()
@@ -225,77 +556,159 @@ class KhApprovalRequest(models.Model):
             email_layout_xmlid="mail.mail_notification_light",  # no SMTP
         )
 
+    def _notifications_deferred(self):
+        """
+        True when System Parameter kh.approval.notification_mode = 'deferred':
+        notification fan-out is queued in kh.approval.outbox instead of running in
+        the user's transaction. The outbox worker replays with kh_outbox_sync.
+        """
+        if self.env.context.get("kh_outbox_sync"):
+            return False
+        icp = self.env['ir.config_parameter'].sudo()
+        return icp.get_param('kh.approval.notification_mode', 'sync') == 'deferred'
+
+    def _dispatch(self, method, calls):
+        """
+        Run notification helper calls now, or queue them all in one go (deferred mode).
+        calls: list of (requests, kwargs).
+        """
+        calls = [(records, kwargs) for records, kwargs in calls if records]
+        if not calls:
+            return
+        if self._notifications_deferred():
+            self.env["kh.approval.outbox"]._enqueue(method, calls)
+            return
+        for records, kwargs in calls:
+            getattr(records, method)(**kwargs)
+
+    def _activity_mode(self):
+        """
+        System Parameter kh.approval.activity_mode: 'request' (default, one To-Do
+        per request) or 'digest' (one rolling activity per user, see kh.approval.digest).
+        """
+        icp = self.env['ir.config_parameter'].sudo()
+        return icp.get_param('kh.approval.activity_mode', 'request')
+
+    def _notify_digest(self, kind, user_ids):
+        """Digest mode: refresh the digests of these users (their queue changed)."""
+        self.env["kh.approval.digest"]._refresh(kind, set(user_ids))
+
     def _ensure_followers(self):
-        """Subscribe requester + all approvers so they see inbox notifications, silently."""
+        """
+        Subscribe requester + all approvers so they see inbox notifications, silently.
+        Requests sharing the same partner set are subscribed in a single call.
+        """
+        groups = defaultdict(list)
         for rec in self:
             partners = rec.requester_id.partner_id | rec.approval_line_ids.mapped("approver_id.partner_id")
             if partners:
-                with rec.env.cr.savepoint():
-                    rec.with_context(mail_post_autofollow=False).message_subscribe(
-                        partner_ids=partners.ids,
-                        subtype_ids=[],  # silent
-                    )
+                groups[frozenset(partners.ids)].append(rec.id)
+        for partner_ids, rec_ids in groups.items():
+            with self.env.cr.savepoint():
+                self.browse(rec_ids).with_context(mail_post_autofollow=False).message_subscribe(
+                    partner_ids=list(partner_ids),
+                    subtype_ids=[],  # silent
+                )
 
-    def _activity_done_silent(self, activity):
-        """Mark a single activity as done with a quiet note."""
+    def _close_all_todos(self, post_note=True):
+        """
+        Close all activities on these requests (any user) in one guarded unlink.
+        Posts one summary note per request listing what was closed, unless
+        post_note is False (the caller folds the list into its own note).
+        Returns {request id: [closed activity labels]}.
+        """
+        activities = self.sudo().activity_ids
+        closed = defaultdict(list)
+        for act in activities:
+            closed[act.res_id].append(
+                f"{tools.html_escape(act.activity_type_id.name or '')}: {tools.html_escape(act.user_id.name or '')}"
+            )
+        if activities:
+            activities.with_context(kh_from_mark_done=True).unlink()
+        if post_note:
+            self._dispatch("_post_note", [(rec, {
+                "body_html": _("Closed activities:<br/>%s") % "<br/>".join(closed[rec.id]),
+                "partner_ids": rec.message_follower_ids.mapped("partner_id").ids,
+            }) for rec in self if closed.get(rec.id)])
+        return closed
+
+    def _todo_vals(self, user, summary, note):
+        """Values for a To-Do activity on this request, assigned to user."""
         self.ensure_one()
-        self.with_context(mail_activity_quick_update=True)._post_note(
-            body_html=f"<div>{activity.activity_type_id.name}: Done</div>",
-            partner_ids=self.message_follower_ids.mapped("partner_id").ids,
+        todo_type = self.env.ref("mail.mail_activity_data_todo")
+        return {
+            "res_model_id": self.env["ir.model"]._get_id(self._name),
+            "res_id": self.id,
+            "activity_type_id": todo_type.id,
+            "automated": True,
+            "date_deadline": todo_type._get_date_deadline(),
+            "user_id": user.id,
+            "summary": summary,
+            "note": note,
+        }
+
+    def _create_todos(self, vals_by_creator):
+        """
+        Create activities in bulk, one create per creating user.
+        vals_by_creator: {res.users record: [activity vals]}.
+        """
+        for creator, vals_list in vals_by_creator.items():
+            if vals_list:
+                with self.env.cr.savepoint():
+                    self.env["mail.activity"].with_user(creator).create(vals_list)
+
+    def _log_state_change(self, old_state, new_state, body):
+        """Log the same state change on every request: one message batch + one tracking create."""
+        if not self:
+            return
+        labels = dict(self._fields["state"]._description_selection(self.env))
+        messages = self.sudo()._message_log_batch(
+            bodies={rec.id: body for rec in self},
+            message_type="notification",
         )
-        activity.with_context(kh_from_mark_done=True).unlink()
-
-    def _close_my_open_todos(self):
-        """Mark my open To-Do activities on this request as done for the current user."""
-        for rec in self:
-            acts = rec.activity_ids.filtered(lambda a: a.user_id.id == self.env.uid)
-            if acts:
-                rec._activity_done_silent(acts)
-
-    def _close_all_todos(self):
-        """Close all To-Do activities on this request (any user)."""
-        for rec in self:
-            for act in rec.activity_ids:
-                rec.sudo()._activity_done_silent(act)
-
-    # -------------------------------------------------------------------------
-    # Throttle helper
-    # -------------------------------------------------------------------------
-    def _recently_notified(self, partner, minutes=10):
-        """Return True if we already sent this partner a 'needs approval' ping recently."""
-        self.ensure_one()
-        Message = self.env['mail.message'].sudo()
-        now = fields.Datetime.now()
-        cutoff = fields.Datetime.subtract(now, minutes=minutes)
-        domain = [
-            ('model', '=', self._name),
-            ('res_id', '=', self.id),
-            ('message_type', '=', 'comment'),
-            ('partner_ids', 'in', [partner.id]),
-            ('body', 'ilike', 'Approval needed'),
-            ('date', '>=', cutoff),
-        ]
-        return bool(Message.search_count(domain))
-
+        field_id = self.env["ir.model.fields"]._get(self._name, "state").id
+        self.env["mail.tracking.value"].sudo().create([{
+            "mail_message_id": message.id,
+            "field_id": field_id,
+            "old_value_char": labels.get(old_state),
+            "new_value_char": labels.get(new_state),
+        } for message in messages])
+
+    @instrumented("_notify_first_pending")
     def _notify_first_pending(self):
         """
-        Ensure ONE To-Do for the current pending approver.
+        Ensure ONE To-Do for each approver of the current stage.
         Default behavior: rely on the Activity as the single Chrome/In-Box notification.
         Optional chatter ping if System Parameter kh.approval.notify_mode = 'message'.
-        Throttled to avoid duplicates if method runs twice.
+        The To-Do only depends on whether the approver already has an open one;
+        the ping is throttled to avoid duplicates if method runs twice (see
+        kh.approval.notify.log, window in System Parameter
+        kh.approval.notify_throttle_minutes).
+        Activities are created in bulk, one create per requester.
+        In digest mode, the approvers' rolling digests are refreshed instead.
         """
+        if self._activity_mode() == "digest":
+            self._notify_digest("approval", self._active_lines().approver_id.ids)
+            return
         todo_type = self.env.ref("mail.mail_activity_data_todo", raise_if_not_found=False)
         icp = self.env['ir.config_parameter'].sudo()
         notify_mode = icp.get_param('kh.approval.notify_mode', 'activity')  # 'activity' | 'message'
-
-        for rec in self:
-            line = rec.approval_line_ids.filtered(lambda l: l.state == "pending")[:1]
-            if not line or not line.approver_id:
+        NotifyLog = self.env["kh.approval.notify.log"]
+        recent = NotifyLog._recent_pairs(self.ids) if notify_mode == 'message' else set()
+
+        activity_vals = defaultdict(list)  # requester -> [activity vals]
+        notified = []  # (request_id, partner_id) for the ledger
+        seen = set()
+        for line in self._active_lines():
+            rec = line.request_id
+            if not line.approver_id:
                 continue
+            partner = line.approver_id.partner_id
 
-            # 0) Throttle
-            if rec._recently_notified(line.approver_id.partner_id, minutes=10):
+            # 0) Once per approver, even when they hold several steps of a stage
+            if (rec.id, partner.id) in seen:
                 continue
+            seen.add((rec.id, partner.id))
 
             # 1) Ensure exactly one open To-Do
             existing = rec.activity_ids
@@ -305,96 +718,141 @@ class KhApprovalRequest(models.Model):
                 )
             else:
                 existing = existing.filtered(lambda a: a.user_id.id == line.approver_id.id)
-            if not existing[:1]:
-                # Switch to the requester's user to ensure they are the creator of the activity.
-                # This allows the requester to cancel it later if they revise the request.
-                request_as_requester = rec.with_user(rec.requester_id)
-                with rec.env.cr.savepoint():
-                    request_as_requester.activity_schedule(
-                        "mail.mail_activity_data_todo",
-                        user_id=line.approver_id.id,
-                        summary=_("Approval needed: %s") % request_as_requester.title,
-                        note=_("Please review approval request %s: %s") % (request_as_requester.name, request_as_requester.title),
-                    )
-            # 2) Optional chatter ping (OFF by default)
-            if notify_mode == 'message':
+            if not existing[:1] and todo_type:
+                activity_vals[rec.requester_id].append(rec._todo_vals(
+                    line.approver_id,
+                    _("Approval needed: %s") % rec.title,
+                    _("Please review approval request %s: %s") % (rec.name, rec.title),
+                ))
+                notified.append((rec.id, partner.id))
+            # 2) Optional chatter ping (OFF by default), throttled
+            if notify_mode == 'message' and (rec.id, partner.id) not in recent:
                 html = _(
                     "🔔 <b>Approval needed</b> for: <a href='%(link)s'>%(name)s</a><br/>Requester: %(req)s"
                 ) % {"link": rec._deeplink(), "name": rec.name, "req": rec.requester_id.name}
                 with rec.env.cr.savepoint():
                     rec.message_notify(
-                        partner_ids=[line.approver_id.partner_id.id],
+                        partner_ids=[partner.id],
                         body=html,
                         subject=f"{rec.name}: {rec.title}",
                         subtype_xmlid="mail.mt_comment",
                         email_layout_xmlid="mail.mail_notification_light",
                     )
+                notified.append((rec.id, partner.id))
+
+        # Create the To-Dos as the requester, so they are the creator of the activity.
+        # This allows the requester to cancel it later if they revise the request.
+        self._create_todos(activity_vals)
+
+        NotifyLog._log(set(notified))
+
     # -------------------------------------------------------------------------
     # Steps generation
     # -------------------------------------------------------------------------
+    @instrumented("_build_approval_lines")
     def _build_approval_lines(self):
         """
         (Re)generate approval steps based on the chosen rule (single rule).
         Uses sudo() so normal users (read-only on lines) can submit.
+        Set-based: one unlink and one create for the whole recordset; rules and
+        their ordered approvers come from the cached rule index.
         """
+        Rule = self.env["kh.approval.rule"]
+        routes = {}
         for rec in self:
-            # Clear any existing generated steps
-            rec.approval_line_ids.sudo().unlink()
-
             if not rec.rule_id:
                 raise UserError(_("Please choose an Approval Rule first."))
 
-            rule = rec.rule_id
+            route = Rule._get_route(rec.rule_id.id, rec.company_id.id)
 
             # Company/department guardrails
-            if rule.company_id and rule.company_id != rec.company_id:
+            if route.company_id and route.company_id != rec.company_id.id:
                 raise UserError(_("Rule belongs to another company."))
-            if rule.department_id and rec.department_id and rule.department_id != rec.department_id:
+            if route.department_id and rec.department_id and route.department_id != rec.department_id.id:
                 raise UserError(_("Rule belongs to another department."))
 
-            # Amount threshold on rule (optional)
-            if rule.min_amount and rec.amount and rec.amount < rule.min_amount:
+            # Amount threshold on rule (optional), both sides in the company's currency
+            if route.min_amount and rec.amount and rec.amount_company_currency < Rule._route_min_amount(
+                route, rec.company_id.id, rec.submitted_on
+            ):
                 raise UserError(_("Amount is below this rule's minimum."))
 
-            vals = []
-            for step in rule.step_ids.sorted(key=lambda s: (s.sequence, s.id)):
-                if not step.approver_id:
-                    continue
-                vals.append({
+            if not route.steps:
+                raise UserError(_("This rule has no approvers defined."))
+            routes[rec] = route
+
+        # Step names default to the approver's name: read them all at once
+        approver_ids = {step[0] for route in routes.values() for step in route.steps}
+        approver_names = {
+            user.id: user.name for user in self.env["res.users"].sudo().browse(approver_ids)
+        }
+
+        vals_list = []
+        for rec, route in routes.items():
+            for approver_id, step_name, stage, quorum in route.steps:
+                vals_list.append({
                     "request_id": rec.id,
-                    "name": step.name or step.approver_id.name,
-                    "approver_id": step.approver_id.id,
+                    "name": step_name or approver_names[approver_id],
+                    "approver_id": approver_id,
                     "required": True,
                     "state": "pending",
+                    "stage": stage,
+                    "stage_quorum": quorum,
                     "company_id": rec.company_id.id,
                 })
 
-            if not vals:
-                raise UserError(_("This rule has no approvers defined."))
-            self.env["kh.approval.line"].sudo().create(vals)
+        # Clear any existing generated steps
+        self.sudo().with_context(active_test=False).approval_line_ids.unlink()
+        self.env["kh.approval.line"].sudo().create(vals_list)
+
+        # Remember which routing applied, one write per rule version
+        by_version = defaultdict(list)
+        for rec, route in routes.items():
+            by_version[route.version_id].append(rec.id)
+        for version_id, rec_ids in by_version.items():
+            self.browse(rec_ids).sudo().write({"rule_version_id": version_id})
+
+    def _active_lines(self):
+        """Pending steps of the current stage of each request under review."""
+        return self.approval_line_ids.filtered(
+            lambda l: l.state == "pending"
+            and l.request_id.state == "in_review"
+            and l.stage == l.request_id.current_stage
+        )
+
+    def _stamp_pending_lines(self):
+        """Record when the current stage's steps became pending (cycle-time reporting)."""
+        lines = self._active_lines().filtered(lambda l: not l.pending_since)
+        if lines:
+            lines.sudo().write({"pending_since": fields.Datetime.now()})
+
     # -------------------------------------------------------------------------
     # Actions (buttons)
     # -------------------------------------------------------------------------
+    @instrumented("action_submit")
     def action_submit(self):
-        """Requester submits: build steps, move to in_review, notify first approver."""
-        for rec in self:
-            if rec.state != "draft":
-                continue
-            rec._build_approval_lines()
-            with rec.env.cr.savepoint():
-                rec._ensure_followers()
-            # 🔇 Avoid email from tracking on state change
-            rec.with_context(tracking_disable=True).write({
-                "state": "in_review",
-                "submitted_on": fields.Datetime.now(),
-            })
-            rec._post_note(
-                _("Request submitted for approval."),
-                partner_ids=[rec.requester_id.partner_id.id],  # Ping requester only
-            )
-            rec._notify_first_pending()
+        """
+        Requester submits: build steps, move to in_review, notify first approver.
+        Runs set-based, so submitting many (e.g. imported) requests at once costs
+        a bounded number of creates/writes instead of a round trip per record.
+        """
+        to_submit = self.filtered(lambda r: r.state == "draft")
+        if not to_submit:
+            return True
+        to_submit._build_approval_lines()
+        with self.env.cr.savepoint():
+            to_submit._ensure_followers()
+        # 🔇 Avoid email from tracking on state change
+        to_submit.with_context(tracking_disable=True).write({
+            "state": "in_review",
+            "submitted_on": fields.Datetime.now(),
+        })
+        to_submit._note_to_requesters(_("Request submitted for approval."))  # Ping requester only
+        to_submit._stamp_pending_lines()
+        self._dispatch("_notify_first_pending", [(to_submit, {})])
         return True
 
+    @instrumented("action_revise_request")
     def action_revise_request(self):
         """
         Requester turns a non-draft request back to Draft to edit safely.
@@ -403,151 +861,683 @@ class KhApprovalRequest(models.Model):
         - Clears approval lines
         - Increments revision
         - Notifies followers & previous approvers
+        Set-based: one unlink for all activities, one for all lines, one write per
+        resulting revision number and one summary note per request.
         """
         for rec in self:
             if rec.requester_id.id != self.env.uid:
                 raise AccessError(_("Only the requester can revise this request."))
             if rec.state not in ('in_review', 'approved', 'rejected'):
                 raise UserError(_("Only non-Draft requests can be revised."))
+        if not self:
+            return True
 
-            prev_approver_partners = rec.approval_line_ids.mapped('approver_id.partner_id')
+        prev_approver_partners = {rec.id: rec.approval_line_ids.mapped('approver_id.partner_id') for rec in self}
+        previous_approvers = self.current_approver_ids
 
-            rec._close_all_todos()
-            rec.approval_line_ids.sudo().unlink()
+        closed = self._close_all_todos(post_note=False)
+        self.approval_line_ids.sudo().with_context(active_test=False).unlink()
 
-            rec.with_context(tracking_disable=True).write({
+        # One write per resulting revision number (usually a single one)
+        now = fields.Datetime.now()
+        by_revision = defaultdict(list)
+        for rec in self:
+            by_revision[rec.revision + 1].append(rec.id)
+        for revision, rec_ids in by_revision.items():
+            self.browse(rec_ids).with_context(tracking_disable=True).write({
                 'state': 'draft',
-                'revision': rec.revision + 1,
+                'revision': revision,
                 'last_revised_by': self.env.user.id,
-                'last_revised_on': fields.Datetime.now(),
+                'last_revised_on': now,
                 'submitted_on': False, # Clear submission date on revise
+                'closed_on': False,
             })
 
-            rec._post_note(
-                _("✏️ Request revised by <b>%s</b>. All approvals have been reset.<br/>"
-                  "Revision: <b>%s</b>") % (self.env.user.name, rec.revision),
-                partner_ids=rec.message_follower_ids.mapped("partner_id").ids,
-            )
-            if prev_approver_partners:
-                rec._post_note(
-                    _("Revised and approvals reset."),
-                    partner_ids=prev_approver_partners.ids,
-                )
+        # One summary note per request, to followers and previous approvers
+        calls = []
+        for rec in self:
+            body = _("✏️ Request revised by <b>%s</b>. All approvals have been reset.<br/>"
+                     "Revision: <b>%s</b>") % (self.env.user.name, rec.revision)
+            if closed.get(rec.id):
+                body += "<br/>" + _("Closed activities:<br/>%s") % "<br/>".join(closed[rec.id])
+            partners = rec.message_follower_ids.mapped("partner_id") | prev_approver_partners[rec.id]
+            calls.append((rec, {"body_html": body, "partner_ids": partners.ids}))
+        self._dispatch("_post_note", calls)
+        if self._activity_mode() == "digest":
+            self._dispatch("_notify_digest", [(self, {"kind": "approval", "user_ids": previous_approvers.ids})])
         return True
     def action_withdraw_request(self):
         # Feature disabled at your request
         raise UserError(_("This option has been disabled by your administrator."))
+    def _check_current_approver(self):
+        """Raise unless the current user is a pending approver of every request under review."""
+        for rec in self:
+            if rec.state == "in_review" and self.env.uid not in rec.current_approver_ids.ids:
+                raise UserError(_("You are not the current approver."))
+
+    # -------------------------------------------------------------------------
+    # Decision locking (approve / reject)
+    # -------------------------------------------------------------------------
+    def _decision_lock_mode(self):
+        """
+        System Parameter kh.approval.decision_lock: 'nowait' (default) gives up at
+        once on a request another decision holds; 'wait' queues behind it.
+        """
+        icp = self.env['ir.config_parameter'].sudo()
+        return icp.get_param('kh.approval.decision_lock', 'nowait')
+
+    def _lock_for_decision(self):
+        """
+        Lock the request rows, in id order, before a decision changes their steps:
+        decisions on one request then run one after the other, instead of both
+        reading the same pending steps and failing (or double advancing) at commit.
+        The request row is the lock for all its steps, since a quorum depends on
+        the sibling steps too.
+        Returns (locked, busy): busy requests are held by another transaction, or
+        were changed by one since ours started (a serialization failure, caught
+        here rather than retried).
+        """
+        if not self:
+            return self, self
+        nowait = " NOWAIT" if self._decision_lock_mode() != "wait" else ""
+        query = f"SELECT id FROM {self._table} WHERE id = ANY(%s) ORDER BY id FOR NO KEY UPDATE{nowait}"
+
+        def lock(records):
+            try:
+                with self.env.cr.savepoint(flush=False):
+                    self.env.cr.execute(query, [records.ids])
+                return True
+            except (LockNotAvailable, SerializationFailure):
+                return False
+
+        if lock(self):
+            return self, self.browse()
+        locked = self.browse([rec.id for rec in self.sorted("id") if lock(rec)])
+        return locked, self - locked
+
+    def _already_decided(self):
+        """Requests the current user has nothing left to decide on (they decided, or the request moved on)."""
+        uid = self.env.uid
+        return self.filtered(lambda r: uid not in r.current_approver_ids.ids and (
+            r.state != "in_review"
+            or uid in r.approval_line_ids.filtered(lambda l: l.state != "pending").approver_id.ids
+        ))
+
+    def _decide(self, method):
+        """
+        Approve/reject entry point: lock, leave alone what is already decided or
+        busy (idempotent: a double click or a replayed call is a no-op), check
+        rights on the rest and run method on it.
+        Returns True, or a notification naming the requests left alone.
+        """
+        locked, busy = self._lock_for_decision()
+        done = locked._already_decided()
+        todo = locked - done
+        todo._check_current_approver()
+        getattr(todo.filtered(lambda r: r.state == "in_review"), method)()
+        skipped = busy | done
+        if not skipped:
+            return True
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Already processed"),
+                "message": _("Already decided, or being decided right now: %s") % ", ".join(skipped.sudo().mapped("name")),
+                "type": "warning",
+                "sticky": False,
+                "next": {"type": "ir.actions.client", "tag": "soft_reload"},
+            },
+        }
+
+    @instrumented("action_approve_request")
     def action_approve_request(self):
         """Current approver approves their step; finish or notify next approver."""
+        return self._decide("_approve")
+
+    def _approve(self, note=False):
+        """
+        Approve the current user's steps in the current stage of each request
+        (caller checked current-approver rights). Stages whose quorum is reached
+        are closed: their remaining steps are skipped.
+        Set-based: one write per line outcome, one for the finished requests, batched chatter.
+        """
+        if not self:
+            return
+        now = fields.Datetime.now()
+        stages = {rec.id: rec.current_stage for rec in self}
+        previous_approvers = self.current_approver_ids
+        line_vals = {"state": "approved", "decided_on": now}
+        if note:
+            line_vals["note"] = note
+        self._active_lines().filtered(lambda l: l.approver_id.id == self.env.uid).sudo().write(line_vals)
+
+        reached = self.filtered(lambda r: r._stage_reached(stages))
+        skipped = reached._stage_lines(stages).filtered(lambda l: l.state == "pending")
+        if skipped:
+            # No decided_on: these approvers did not decide (cycle-time reporting)
+            skipped.sudo().write({"state": "skipped"})
+
+        # Close my To-Dos and those of the approvers no longer needed
+        todo_users = defaultdict(set)
         for rec in self:
-            if rec.state != "in_review":
-                continue
+            todo_users[rec.id].add(self.env.uid)
+        for line in skipped:
+            todo_users[line.request_id.id].add(line.approver_id.id)
+        self._unlink_todos(todo_users)
+        if self._activity_mode() == "digest":
+            self._dispatch("_notify_digest", [(self, {"kind": "approval", "user_ids": previous_approvers.ids})])
+
+        self._note_to_requesters(_("Approved by <b>%s</b>.") % self.env.user.name)
+
+        finished = self.filtered(lambda r: not r.pending_line_id)
+        (self - finished)._stamp_pending_lines()
+        self._dispatch("_notify_first_pending", [(self - finished, {})])
+        if not finished:
+            return
+
+        # Final approval: log state change in chatter. Without an amount
+        # there is nothing to pay, so the request is closed now.
+        no_payment = finished.filtered(lambda r: r.amount <= 0)
+        (finished - no_payment).sudo().write({"state": "approved"})
+        no_payment.sudo().write({"state": "approved", "closed_on": now})
+        finished._log_state_change("in_review", "approved", _("Request approved."))
+
+        self._dispatch("_notify_partner", [(rec, {
+            "partner": rec.requester_id.partner_id,
+            "body_html": _("✅ <b>Approved</b>: <a href='%(link)s'>%(name)s: %(title)s</a>") % {"link": rec._deeplink(), "name": rec.name, "title": rec.title},
+            "subject": f"Approved: {rec.name}",
+        }) for rec in finished])
+        self._dispatch("_notify_payment_user", [(finished, {})])
+
+    def _stage_lines(self, stages):
+        """Steps of the given stage of each request. stages: {request id: stage}."""
+        return self.approval_line_ids.filtered(lambda l: l.stage == stages.get(l.request_id.id))
+
+    def _stage_reached(self, stages):
+        """True when the stage (see _stage_lines) has the approvals its quorum needs."""
+        self.ensure_one()
+        lines = self._stage_lines(stages)
+        approved = lines.filtered(lambda l: l.state == "approved")
+        return len(approved) >= (lines[:1].stage_quorum or len(lines))
 
-            line = rec.approval_line_ids.filtered(lambda l: l.state == "pending")[:1]
-            if not line or line.approver_id.id != self.env.uid:
-                raise UserError(_("You are not the current approver."))
+    def _stage_reachable(self, stages):
+        """False once too many steps of the stage were rejected for its quorum to be reached."""
+        self.ensure_one()
+        lines = self._stage_lines(stages)
+        possible = lines.filtered(lambda l: l.state in ("approved", "pending"))
+        return len(possible) >= (lines[:1].stage_quorum or len(lines))
 
-            # Find the open activity for the current user (the approver) and, as the
-            # request owner (creator), unlink it to avoid permission errors.
-            activity_to_close = rec.activity_ids.filtered(lambda a: a.user_id.id == self.env.uid)[:1]
-            if activity_to_close:
-                activity_to_close.with_user(rec.requester_id).unlink()
+    def _unlink_todos(self, user_ids_by_request):
+        """
+        Unlink the activities of the given users on each request, as the request
+        owner (the activity creator) to avoid permission errors; one unlink per owner.
+        user_ids_by_request: {request id: set of user ids}.
+        """
+        to_close = defaultdict(lambda: self.env["mail.activity"])
+        for rec in self:
+            user_ids = user_ids_by_request.get(rec.id)
+            if user_ids:
+                to_close[rec.requester_id] |= rec.activity_ids.filtered(lambda a: a.user_id.id in user_ids)
+        for requester, activities in to_close.items():
+            if activities:
+                activities.with_user(requester).unlink()
+
+    @api.model
+    def _payment_user(self):
+        """User handling payments of approved requests (hardcoded, see action_mark_as_paid)."""
+        return self.env['res.users'].browse(363).exists()
+
+    def _notify_payment_user(self):
+        """
+        Add user 363 as a follower of the approved requests and create an activity
+        for them, with the request owner as the creator of the activity
+        (digest mode: refresh their payment digest instead).
+        """
+        user_to_notify_and_follow = self._payment_user()
+        if user_to_notify_and_follow:
+            activity_vals = defaultdict(list)
+            for requester in self.mapped("requester_id"):
+                # The requester adds user 363 as a follower
+                self.filtered(lambda r: r.requester_id == requester).with_user(requester).message_subscribe(
+                    partner_ids=[user_to_notify_and_follow.partner_id.id]
+                )
+            if self._activity_mode() == "digest":
+                self._notify_digest("payment", user_to_notify_and_follow.ids)
+                return
+            # The requester creates an activity for user 363
+            for rec in self:
+                activity_vals[rec.requester_id].append(rec._todo_vals(
+                    user_to_notify_and_follow,
+                    _("Request Approved: %s") % rec.title,
+                    _("Your request %s has been approved. Please mark as paid.") % (rec.name),
+                ))
+            self._create_todos(activity_vals)
+
+    @instrumented("action_reject_request")
+    def action_reject_request(self):
+        """Current approver rejects; request becomes Rejected and requester is pinged."""
+        return self._decide("_reject")
 
-            line.sudo().write({"state": "approved"})
+    def _reject(self, note=False):
+        """
+        Reject the current user's steps in the current stage of each request
+        (caller checked current-approver rights). A request is rejected once its
+        stage can no longer reach its quorum; otherwise the other approvers of
+        the stage can still approve it.
+        Set-based: one write for the lines, one for the requests, batched chatter.
+        """
+        if not self:
+            return
+        stages = {rec.id: rec.current_stage for rec in self}
+        previous_approvers = self.current_approver_ids
+        line_vals = {"state": "rejected", "decided_on": fields.Datetime.now()}
+        if note:
+            line_vals["note"] = note
+        self._active_lines().filtered(lambda l: l.approver_id.id == self.env.uid).sudo().write(line_vals)
+
+        rejected = self.filtered(lambda r: not r._stage_reachable(stages))
+        skipped = rejected._stage_lines(stages).filtered(lambda l: l.state == "pending")
+        if skipped:
+            # No decided_on: these approvers did not decide (cycle-time reporting)
+            skipped.sudo().write({"state": "skipped"})
+
+        # Close my To-Dos and those of the approvers no longer needed
+        todo_users = defaultdict(set)
+        for rec in self:
+            todo_users[rec.id].add(self.env.uid)
+        for line in skipped:
+            todo_users[line.request_id.id].add(line.approver_id.id)
+        self._unlink_todos(todo_users)
+        if self._activity_mode() == "digest":
+            self._dispatch("_notify_digest", [(self, {"kind": "approval", "user_ids": previous_approvers.ids})])
+        (self - rejected)._note_to_requesters(
+            _("Rejected by <b>%s</b>; the other approvers of this stage can still approve it.") % self.env.user.name
+        )
+        if not rejected:
+            return
 
-            rec._post_note(
-                _("Approved by <b>%s</b>.") % self.env.user.name,
-                partner_ids=[rec.requester_id.partner_id.id],
-            )
+        # Log state change in chatter
+        rejected.sudo().write({"state": "rejected", "closed_on": fields.Datetime.now()})
+        rejected._log_state_change(
+            "in_review", "rejected", _("❌ Rejected by <b>%s</b>.") % self.env.user.name
+        )
 
-            next_line = rec.approval_line_ids.filtered(lambda l: l.state == "pending")[:1]
-            if next_line:
-                rec._notify_first_pending()
+        self._dispatch("_notify_partner", [(rec, {
+            "partner": rec.requester_id.partner_id,
+            "body_html": _("❌ <b>Rejected</b>: <a href='%(link)s'>%(name)s: %(title)s</a>") % {"link": rec._deeplink(), "name": rec.name, "title": rec.title},
+            "subject": f"Rejected: {rec.name}",
+        }) for rec in rejected])
+
+    def _bulk_decide(self, decision, note=False):
+        """
+        Approve or reject many requests at once for the current user.
+        Rights are checked in one query; the batch runs set-based and, if it fails,
+        falls back to one savepoint per request so failures stay isolated.
+        Returns {request id: error message or False}.
+        """
+        method = "_approve" if decision == "approve" else "_reject"
+        allowed = self.search([
+            ("id", "in", self.ids),
+            ("state", "=", "in_review"),
+            ("current_approver_ids", "in", [self.env.uid]),
+        ])
+        results = dict.fromkeys((self - allowed).ids, _("You are not the current approver."))
+        allowed, busy = allowed._lock_for_decision()
+        results.update(dict.fromkeys(busy.ids, _("Already being decided by someone else.")))
+        try:
+            with self.env.cr.savepoint():
+                getattr(allowed, method)(note=note)
+            results.update(dict.fromkeys(allowed.ids, False))
+        except Exception:
+            for rec in allowed:
+                try:
+                    with self.env.cr.savepoint():
+                        getattr(rec, method)(note=note)
+                    results[rec.id] = False
+                except Exception as e:
+                    results[rec.id] = str(e)
+        return results
+
+    # -------------------------------------------------------------------------
+    # Bulk ingestion (upstream systems, see controllers/main.py)
+    # -------------------------------------------------------------------------
+    @api.model
+    def _ingest_vals(self, item):
+        """Validate one payload item and return create() values (rule resolved if empty)."""
+        if not isinstance(item, dict):
+            raise UserError(_("Each request must be a JSON object."))
+        unknown = set(item) - set(self._INGEST_FIELDS) - {"idempotency_key", "submit"}
+        if unknown:
+            raise UserError(_("Unknown field(s): %s") % ", ".join(sorted(unknown)))
+        if not item.get("title"):
+            raise UserError(_("A title is required."))
+        vals = {key: item[key] for key in self._INGEST_FIELDS if key in item}
+        vals.setdefault("company_id", self.env.company.id)
+        if vals["company_id"] not in self.env.user.company_ids.ids:
+            raise AccessError(_("You cannot create requests for company %s.") % vals["company_id"])
+        if not vals.get("rule_id"):
+            route = self.env["kh.approval.rule"]._resolve_route(
+                vals["company_id"], vals.get("department_id"), self._to_company_currency(
+                    vals.get("amount"), vals.get("currency_id"), vals["company_id"],
+                ),
+            )
+            if not route:
+                raise UserError(_("No approval rule matches this request."))
+            vals["rule_id"] = route.id
+        vals["ingest_key"] = item["idempotency_key"]
+        return vals
+
+    @api.model
+    def _ingest(self, items, submit=False):
+        """
+        Create (and, if `submit` or the item's own "submit" says so, submit)
+        requests from one chunk of upstream payloads.
+
+        Every item needs an "idempotency_key": items whose key already exists
+        are reported, not created again. The chunk is created and submitted
+        set-based under one savepoint; if that fails, each item is retried
+        under its own savepoint so one bad item does not abort the others.
+        Returns one result dict per item, in order.
+        """
+        results = [None] * len(items)
+        todo = {}  # idempotency key -> item index
+        for index, item in enumerate(items):
+            key = item.get("idempotency_key") if isinstance(item, dict) else None
+            if not key or not isinstance(key, str):
+                results[index] = {"idempotency_key": key, "status": "error", "error": _("Missing idempotency_key.")}
+            elif key in todo:
+                results[index] = {"idempotency_key": key, "status": "error", "error": _("Duplicate idempotency_key in payload.")}
             else:
-                # Final approval: log state change in chatter
-                old_state = rec.state
-                rec.sudo().write({"state": "approved"})
-                rec.message_post(
-                    body=_("Request approved."),
-                    tracking_value_ids=[(0, 0, {
-                        'field_id': self.env['ir.model.fields']._get(self._name, 'state').id,
-                        'old_value_char': dict(self._fields['state'].selection).get(old_state),
-                        'new_value_char': dict(self._fields['state'].selection).get('approved'),
-                    })],
-                    message_type="notification",
-                    subtype_xmlid="mail.mt_comment",
-                    partner_ids=[rec.requester_id.partner_id.id]
-                )
+                todo[key] = index
 
-                rec._notify_partner(
-                    rec.requester_id.partner_id,
-                    _("✅ <b>Approved</b>: <a href='%(link)s'>%(name)s: %(title)s</a>") % {"link": rec._deeplink(), "name": rec.name, "title": rec.title},
-                    subject=f"Approved: {rec.name}",
-                )
+        def result(rec, status):
+            return {
+                "idempotency_key": rec.ingest_key, "status": status,
+                "id": rec.id, "name": rec.name, "state": rec.state,
+            }
 
-                # Add user 152 as a follower and create activity for them,
-                # with the request owner as the creator of the activity.
-                user_to_notify_and_follow = self.env['res.users'].browse(363)
-                if user_to_notify_and_follow.exists():
-                    # The requester adds user 152 as a follower
-                    rec.with_user(rec.requester_id.id).message_subscribe(
-                        partner_ids=[user_to_notify_and_follow.partner_id.id]
-                    )
+        # Replays: keys are global, so look them up regardless of record rules
+        for rec in self.sudo().search([("ingest_key", "in", list(todo))]):
+            results[todo.pop(rec.ingest_key)] = result(rec, "exists")
 
-                    # The requester creates an activity for user 152
-                    rec.with_user(rec.requester_id.id).activity_schedule(
-                        'mail.mail_activity_data_todo',
-                        user_id=user_to_notify_and_follow.id,
-                        summary=_("Request Approved: %s") % rec.title,
-                        note=_("Your request %s has been approved. Please mark as paid.") % (rec.name),
-                    )
-        return True
+        batch = []  # (index, vals, submit)
+        for key, index in todo.items():
+            item = items[index]
+            try:
+                batch.append((index, self._ingest_vals(item), item.get("submit", submit)))
+            except (UserError, AccessError) as e:
+                results[index] = {"idempotency_key": key, "status": "error", "error": str(e)}
+
+        def run(entries):
+            # create() fills in the name: copies, so a retry after a rolled back
+            # savepoint does not reuse a number reserved inside it
+            records = self.create([dict(vals) for _index, vals, _submit in entries])
+            self.browse([
+                rec.id for rec, (_index, _vals, flag) in zip(records, entries) if flag
+            ]).action_submit()
+            return records
+
+        try:
+            with self.env.cr.savepoint():
+                records = run(batch)
+            for (index, _vals, _submit), rec in zip(batch, records):
+                results[index] = result(rec, "created")
+        except Exception:
+            for entry in batch:
+                index, vals, _submit = entry
+                try:
+                    with self.env.cr.savepoint():
+                        rec = run([entry])
+                    results[index] = result(rec, "created")
+                except Exception as e:
+                    # A concurrent worker may have ingested the same key meanwhile
+                    rec = self.sudo().search([("ingest_key", "=", vals["ingest_key"])], limit=1)
+                    results[index] = result(rec, "exists") if rec else {
+                        "idempotency_key": vals["ingest_key"], "status": "error", "error": str(e),
+                    }
+        return results
 
-    def action_reject_request(self):
-        """Current approver rejects; request becomes Rejected and requester is pinged."""
-        for rec in self:
-            if rec.state != "in_review":
-                continue
+    # -------------------------------------------------------------------------
+    # History export (see controllers/main.py)
+    # -------------------------------------------------------------------------
+    @api.model
+    def _export_history_header(self):
+        return [
+            _("Request ID"), _("Title"), _("Company"), _("Department"), _("Requester"),
+            _("Amount"), _("Currency"), _("Amount (Company Currency)"), _("Status"), _("Payment Status"), _("Submitted On"),
+            _("Step"), _("Approver"), _("Step Status"), _("Decided On"), _("Step Note"),
+        ]
 
-            line = rec.approval_line_ids.filtered(lambda l: l.state == "pending")[:1]
-            if not line or line.approver_id.id != self.env.uid:
-                raise UserError(_("You are not the current approver."))
+    @api.model
+    def _export_history_rows(self, domain, chunk_size=1000):
+        """
+        Yield one row per approval step, archived ones included (one row for
+        requests without steps), following _export_history_header(). Requests are read in id order,
+        `chunk_size` at a time (keyset pagination), as the current user, so
+        record rules apply to both requests and steps. The cache is dropped
+        after each chunk so memory stays bounded whatever the number of rows.
+        """
+        Line = self.env["kh.approval.line"]
+        states = dict(self._fields["state"]._description_selection(self.env))
+        payment_states = dict(self._fields["payment_state"]._description_selection(self.env))
+        step_states = dict(Line._fields["state"]._description_selection(self.env))
+        last_id = 0
+        while True:
+            requests = self.search_fetch(
+                list(domain) + [("id", ">", last_id)],
+                ["name", "title", "company_id", "department_id", "requester_id", "amount",
+                 "currency_id", "amount_company_currency", "state", "payment_state", "submitted_on", "archived_steps"],
+                order="id",
+                limit=chunk_size,
+            )
+            if not requests:
+                return
+            steps = defaultdict(list)
+            for line in Line.with_context(active_test=False).search_fetch(
+                [("request_id", "in", requests.ids)],
+                ["request_id", "name", "approver_id", "state", "decided_on", "note"],
+                order="request_id, id",
+            ):
+                steps[line.request_id.id].append(line)
+
+            for rec in requests:
+                # Requests archived before their steps were kept: steps come from their snapshot
+                rec_steps = steps[rec.id] or rec.archived_steps or []
+                head = [
+                    rec.name, rec.title, rec.company_id.display_name, rec.department_id.display_name or "",
+                    rec.requester_id.display_name or "", rec.amount, rec.currency_id.name,
+                    rec.amount_company_currency,
+                    states.get(rec.state, ""), payment_states.get(rec.payment_state, ""),
+                    fields.Datetime.to_string(rec.submitted_on) or "",
+                ]
+                for line in rec_steps or [None]:
+                    if line is None:
+                        yield head + [""] * 5
+                    elif isinstance(line, dict):
+                        yield head + [
+                            line["name"], line["approver"], step_states.get(line["state"], ""),
+                            line["decided_on"] or "", line["note"],
+                        ]
+                    else:
+                        yield head + [
+                            line.name or "", line.approver_id.display_name or "",
+                            step_states.get(line.state, ""),
+                            fields.Datetime.to_string(line.decided_on) or "", line.note or "",
+                        ]
+            last_id = requests[-1].id
+            self.env.invalidate_all()
+            if len(requests) < chunk_size:
+                return
 
-            rec._close_my_open_todos()
-            line.sudo().write({"state": "rejected"})
-
-            # Log state change in chatter
-            old_state = rec.state
-            rec.sudo().write({"state": "rejected"})
-            rec.message_post(
-                body=_("❌ Rejected by <b>%s</b>.") % self.env.user.name,
-                tracking_value_ids=[(0, 0, {
-                    'field_id': self.env['ir.model.fields']._get(self._name, 'state').id,
-                    'old_value_char': dict(self._fields['state'].selection).get(old_state),
-                    'new_value_char': dict(self._fields['state'].selection).get('rejected'),
-                })],
+    # -------------------------------------------------------------------------
+    # Archival (cron)
+    # -------------------------------------------------------------------------
+    @api.model
+    def _archive_after_days(self):
+        """Requests closed longer ago than this are archived, System Parameter kh.approval.archive_after_days (default 0 = off)."""
+        icp = self.env['ir.config_parameter'].sudo()
+        try:
+            return int(icp.get_param('kh.approval.archive_after_days', 0))
+        except (TypeError, ValueError):
+            return 0
+
+    @api.model
+    def _archive_domain(self, cutoff):
+        """Closed requests (rejected, or approved and paid / without amount) closed before cutoff."""
+        return [
+            ("closed_on", "<", cutoff),
+            "|",
+            ("state", "=", "rejected"),
+            "&",
+            ("state", "=", "approved"),
+            "|",
+            ("payment_state", "=", "paid"),
+            ("amount", "<=", 0),
+        ]
+
+    @api.model
+    def _cron_archive(self, batch_size=500):
+        """Archive closed requests in batches; commit after each batch, so a stopped run resumes."""
+        days = self._archive_after_days()
+        if days <= 0:
+            return True
+        cutoff = fields.Datetime.subtract(fields.Datetime.now(), days=days)
+        domain = self._archive_domain(cutoff)
+        while True:
+            requests = self.sudo().search(domain, order="id", limit=batch_size)
+            if not requests:
+                break
+            requests._archive_closed()
+            if not self.env.registry.in_test_mode():
+                self.env.cr.commit()
+            self.env.invalidate_all()
+            if len(requests) < batch_size:
+                break
+        return True
+
+    def _archive_closed(self):
+        """
+        Archive the requests: keep their steps as a snapshot (archived_steps) and
+        archive the line rows, which stay in the cycle-time statistics and the
+        history export. With System Parameter kh.approval.archive_compact_chatter
+        set, their system notifications (state changes, tracking) are removed
+        and replaced by one summary note.
+        """
+        requests = self.sudo()
+        lines = requests.approval_line_ids
+        snapshots = defaultdict(list)
+        for line, step in zip(lines, lines._snapshot()):
+            snapshots[line.request_id.id].append(step)
+        now = fields.Datetime.now()
+        for rec in requests:
+            rec.archived_steps = snapshots.get(rec.id) or rec.archived_steps or []
+            rec.archived_on = now
+        requests.flush_recordset(["archived_steps", "archived_on"])
+        lines.write({"active": False})
+        requests.with_context(tracking_disable=True).write({"active": False})
+
+        icp = self.env['ir.config_parameter'].sudo()
+        if icp.get_param('kh.approval.archive_compact_chatter'):
+            messages = self.env["mail.message"].sudo().search([
+                ("model", "=", self._name),
+                ("res_id", "in", requests.ids),
+                ("message_type", "=", "notification"),
+            ])
+            counts = defaultdict(int)
+            for message in messages:
+                counts[message.res_id] += 1
+            messages.unlink()
+            requests.browse(list(counts))._message_log_batch(
+                bodies={
+                    rec_id: _("Archived: %s system notification(s) compacted.") % count
+                    for rec_id, count in counts.items()
+                },
                 message_type="notification",
-                subtype_xmlid="mail.mt_comment",
-                partner_ids=[rec.requester_id.partner_id.id]
             )
 
-            rec._notify_partner(
-                rec.requester_id.partner_id,
-                _("❌ <b>Rejected</b>: <a href='%(link)s'>%(name)s: %(title)s</a>") % {"link": rec._deeplink(), "name": rec.name, "title": rec.title},
-                subject=f"Rejected: {rec.name}",
+    # -------------------------------------------------------------------------
+    # Reminders & escalation (cron)
+    # -------------------------------------------------------------------------
+    @api.model
+    def _cron_overdue(self, batch_size=200):
+        """
+        Remind the approvers of steps pending longer than their rule's
+        reminder_hours, and escalate the ones past escalation_hours (counted
+        from the last escalation for steps already escalated; pending_since
+        keeps the real waiting time).
+        One locking query per batch (SKIP LOCKED, so overlapping runs split the
+        work instead of doubling it) and a commit after each batch: handled
+        steps are stamped (reminded_on / escalated_on) and are no longer due,
+        so a run stopped midway simply resumes on the next one.
+        """
+        cr = self.env.cr
+        cr.execute("""
+            SELECT min(least(nullif(reminder_hours, 0), nullif(escalation_hours, 0)))
+              FROM kh_approval_rule
+             WHERE active
+        """)
+        min_hours = cr.fetchone()[0]
+        if not min_hours:
+            return True
+        now = fields.Datetime.now()
+        # Nothing pending for less than the shortest threshold can be due (index range)
+        horizon = fields.Datetime.subtract(now, hours=min_hours)
+        Line = self.env["kh.approval.line"].sudo()
+        last_id = 0
+        while True:
+            self.env.flush_all()
+            cr.execute(
+                """
+                SELECT l.id,
+                       ru.escalation_hours > 0
+                       AND COALESCE(l.escalated_on, l.pending_since) <= %(now)s - make_interval(hours => ru.escalation_hours)
+                  FROM kh_approval_line l
+                  JOIN kh_approval_request r ON r.id = l.request_id
+                  JOIN kh_approval_rule ru ON ru.id = r.rule_id
+                 WHERE l.state = 'pending'
+                   AND l.pending_since <= %(horizon)s
+                   AND l.id > %(last_id)s
+                   AND r.state = 'in_review' AND r.active AND l.stage = r.current_stage
+                   AND (
+                        (ru.escalation_hours > 0
+                         AND COALESCE(l.escalated_on, l.pending_since) <= %(now)s - make_interval(hours => ru.escalation_hours))
+                     OR (ru.reminder_hours > 0
+                         AND COALESCE(l.reminded_on, l.escalated_on, l.pending_since)
+                             <= %(now)s - make_interval(hours => ru.reminder_hours))
+                   )
+              ORDER BY l.id
+                 LIMIT %(limit)s
+                   FOR UPDATE OF l SKIP LOCKED
+                """,
+                {"now": now, "horizon": horizon, "last_id": last_id, "limit": batch_size},
             )
+            rows = cr.fetchall()
+            if not rows:
+                break
+            Line.browse([line_id for line_id, escalate in rows if escalate])._escalate(now)
+            Line.browse([line_id for line_id, escalate in rows if not escalate])._remind(now)
+            last_id = rows[-1][0]
+            if not self.env.registry.in_test_mode():
+                cr.commit()
+            self.env.invalidate_all()
+            if len(rows) < batch_size:
+                break
         return True
 
     def action_opt_out_as_approver(self):
         # Feature disabled at your request
         raise UserError(_("This option has been disabled by your administrator."))
 
+    @instrumented("action_mark_as_paid")
     def action_mark_as_paid(self):
-        """Marks the request as paid and notifies the responsible user."""
-        # The user ID to notify. As requested, this is hardcoded to 152.
+        """
+        Marks the requests as paid and notifies the responsible user.
+        Set-based: one write, one note per follower set, one activity create.
+        """
+        # The user to notify is hardcoded to 363 (see _payment_user).
         # For more flexibility, this could be moved to a System Parameter.
-        user_to_notify_id = 363 
-
+        user_to_notify = self._payment_user()
         for rec in self:
             if rec.state != 'approved':
                 raise UserError(_("Only approved requests can be marked as paid."))
@@ -555,33 +1545,43 @@ class KhApprovalRequest(models.Model):
                 raise UserError(_("This request has already been marked as paid."))
             if not rec.amount > 0:
                 raise UserError(_("This action is only for requests with a payment amount."))
+        if not self:
+            return True
 
-            rec.write({'payment_state': 'paid'})
-
-            # Post a note in the chatter
-            rec._post_note(
-                _("Request marked as <b>Paid</b> by %s.") % self.env.user.name,
-                partner_ids=rec.message_follower_ids.mapped("partner_id").ids,
-            )
+        self.write({'payment_state': 'paid', 'closed_on': fields.Datetime.now()})
 
-            # Schedule an activity for the designated user
-            try:
-                user_to_notify = self.env['res.users'].browse(user_to_notify_id).exists()
-                if user_to_notify:
-                    # To ensure the activity is created correctly without being overridden by other logic,
-                    # we create it as a superuser. This bypasses any user-context-based rules that might
-                    # alter the assigned user.
-                    self.env['mail.activity'].with_context(mail_activity_quick_update=True).sudo().create({
-                        'res_id': rec.id,
-                        'res_model_id': self.env['ir.model']._get_id(rec._name),
-                        'activity_type_id': self.env.ref('mail.mail_activity_data_todo').id,
-                        'summary': _("Payment Processed: %s") % rec.title,
-                        'note': _("Approval request %s for %s has been marked as paid.") % (rec.name, rec.requester_id.name),
-                        'user_id': user_to_notify.id,
-                    })
-            except Exception as e:
-                # Fails silently if user 152 doesn't exist to avoid blocking the process.
-                pass
+        # Post a note in the chatter, one batch per set of followers
+        by_followers = defaultdict(lambda: self.browse())
+        for rec in self:
+            by_followers[tuple(sorted(rec.message_follower_ids.partner_id.ids))] |= rec
+        self._dispatch("_post_note", [
+            (requests, {
+                "body_html": _("Request marked as <b>Paid</b> by %s.") % self.env.user.name,
+                "partner_ids": list(partner_ids),
+            })
+            for partner_ids, requests in by_followers.items()
+        ])
+
+        if not user_to_notify:
+            return True
+        if self._activity_mode() == "digest":
+            self._notify_digest("payment", user_to_notify.ids)
+            return True
+        # Schedule the activities for the designated user as superuser, so that
+        # no user-context-based rule alters the assigned user. Fails silently
+        # to avoid blocking the payment.
+        try:
+            with self.env.cr.savepoint():
+                self.env['mail.activity'].with_context(mail_activity_quick_update=True).sudo().create([{
+                    'res_id': rec.id,
+                    'res_model_id': self.env['ir.model']._get_id(rec._name),
+                    'activity_type_id': self.env.ref('mail.mail_activity_data_todo').id,
+                    'summary': _("Payment Processed: %s") % rec.title,
+                    'note': _("Approval request %s for %s has been marked as paid.") % (rec.name, rec.requester_id.name),
+                    'user_id': user_to_notify.id,
+                } for rec in self])
+        except Exception:
+            pass
         return True
 
 
@@ -606,10 +1606,211 @@ class KhApprovalRule(models.Model):
         required=True,
     )
 
+    # SLA of each step (see kh.approval.request._cron_overdue); 0 = off
+    reminder_hours = fields.Integer(
+        string="Remind After (hours)",
+        default=24,
+        help="Remind the approver when a step is pending this long, and again every as many hours. 0 = never.",
+    )
+    escalation_hours = fields.Integer(
+        string="Escalate After (hours)",
+        default=72,
+        help="Hand the step to the backup approver (or alert the approval managers) "
+             "when it is pending this long, and again every as many hours. 0 = never.",
+    )
+    backup_approver_id = fields.Many2one("res.users", string="Backup Approver")
+
     # Ordered approver sequence
     step_ids = fields.One2many(
         "kh.approval.rule.step", "rule_id", string="Steps", copy=True
     )
+    # Optional parallel stages grouping some of the steps
+    stage_ids = fields.One2many(
+        "kh.approval.rule.stage", "rule_id", string="Parallel Stages", copy=False
+    )
+
+    # Compiled, immutable routes (one per change)
+    version_ids = fields.One2many(
+        "kh.approval.rule.version", "rule_id", string="Versions", readonly=True, copy=False
+    )
+    current_version_id = fields.Many2one(
+        "kh.approval.rule.version",
+        string="Current Version",
+        compute="_compute_current_version",
+        store=True,
+    )
+
+    @api.depends("version_ids")
+    def _compute_current_version(self):
+        for rule in self:
+            rule.current_version_id = rule.version_ids.sorted("version")[-1:]
+
+    # -------------------------------------------------------------------------
+    # ORM overrides (keep compiled routes and the rule index in sync, across workers)
+    # -------------------------------------------------------------------------
+    # Fields the compiled route and the rule index depend on (see _prepare_route_vals, _get_routes)
+    _ROUTE_FIELDS = frozenset({"active", "company_id", "department_id", "min_amount", "currency_id", "step_ids", "stage_ids"})
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        rules = super().create(vals_list)
+        rules._compile_route()
+        self.env.registry.clear_cache()
+        return rules
+
+    def write(self, vals):
+        res = super().write(vals)
+        if self._ROUTE_FIELDS.intersection(vals):
+            self._compile_route()
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
+
+    def copy(self, default=None):
+        """Duplicate the parallel stages too, and point the copied steps at them."""
+        # Compile once the steps point at the copied stages, not the intermediate state
+        rules = self.with_context(kh_skip_compile=True)
+        new_rules = super(KhApprovalRule, rules).copy(default)
+        for rule, new_rule in zip(rules, new_rules):
+            if not rule.stage_ids:
+                continue
+            stage_map = {stage: stage.copy({"rule_id": new_rule.id}) for stage in rule.stage_ids}
+            # Steps are copied in order, so the copies line up with the originals
+            new_steps = defaultdict(lambda: rules.env["kh.approval.rule.step"])
+            for step, new_step in zip(rule.step_ids, new_rule.step_ids):
+                if step.stage_id:
+                    new_steps[stage_map[step.stage_id]] |= new_step
+            for new_stage, steps in new_steps.items():
+                steps.write({"stage_id": new_stage.id})
+        new_rules = new_rules.with_env(self.env)
+        new_rules._compile_route()
+        self.env.registry.clear_cache()
+        return new_rules
+
+    # -------------------------------------------------------------------------
+    # Route compilation
+    # -------------------------------------------------------------------------
+    def _prepare_route_vals(self):
+        """
+        Route as [approver_id, step name, stage, quorum] entries. Steps without
+        a stage are stages of their own; a stage takes its place in the order
+        by its own sequence.
+        """
+        self.ensure_one()
+        stages = defaultdict(lambda: self.env["kh.approval.rule.step"])
+        for step in self.step_ids.filtered("approver_id"):
+            stages[step.stage_id or step] |= step
+        ordered = sorted(stages.items(), key=lambda item: (item[0].sequence, item[0]._name, item[0].id))
+        route = []
+        for number, (stage, steps) in enumerate(ordered, 1):
+            quorum = stage._quorum_count(len(steps)) if stage._name == "kh.approval.rule.stage" else 1
+            for step in steps.sorted(key=lambda s: (s.sequence, s.id)):
+                route.append([step.approver_id.id, step.name or False, number, quorum])
+        return {
+            "route": route,
+            "company_id": self.company_id.id,
+            "department_id": self.department_id.id,
+            "min_amount": self.min_amount,
+            "currency_id": self.currency_id.id,
+        }
+
+    def _compile_route(self):
+        """
+        Save a new immutable version for every rule whose route changed.
+        Skipped with kh_skip_compile in the context, while a caller builds a
+        rule in several writes and compiles it once at the end (see copy).
+        """
+        if self.env.context.get("kh_skip_compile"):
+            return
+        vals_list = []
+        for rule in self.sudo().exists():
+            vals = rule._prepare_route_vals()
+            current = rule.current_version_id
+            signature = (
+                tuple(tuple(step) for step in vals["route"]),
+                vals["company_id"], vals["department_id"], vals["min_amount"], vals["currency_id"],
+            )
+            if current and current._signature() == signature:
+                continue
+            vals.update(rule_id=rule.id, version=(current.version or 0) + 1)
+            vals_list.append(vals)
+        if vals_list:
+            self.env["kh.approval.rule.version"].sudo().create(vals_list)
+
+    # -------------------------------------------------------------------------
+    # Rule index & resolution
+    # -------------------------------------------------------------------------
+    def _to_route(self):
+        self.ensure_one()
+        version = self.current_version_id
+        if not version:
+            # Not compiled yet (e.g. data loaded before the versions existed)
+            self._compile_route()
+            version = self.current_version_id
+        return RuleRoute(
+            id=self.id,
+            version_id=version.id,
+            company_id=version.company_id.id,
+            department_id=version.department_id.id,
+            min_amount=version.min_amount,
+            currency_id=version.currency_id.id,
+            steps=tuple(
+                # Versions compiled before stages existed: one stage per step
+                (step[0], step[1] or False, step[2] if len(step) > 2 else number, step[3] if len(step) > 3 else 1)
+                for number, step in enumerate(version.route, 1)
+            ),
+        )
+
+    @api.model
+    @tools.ormcache("company_id")
+    def _get_routes(self, company_id):
+        """Active rules usable by a company (its own + global ones), as immutable routes."""
+        rules = self.sudo().with_context(active_test=True).search(
+            [("company_id", "in", [False, company_id])], order="id"
+        )
+        return tuple(rule._to_route() for rule in rules)
+
+    @api.model
+    def _get_route(self, rule_id, company_id):
+        """Route of a given rule; falls back to reading it when not in the index (e.g. archived)."""
+        for route in self._get_routes(company_id):
+            if route.id == rule_id:
+                return route
+        return self.sudo().with_context(active_test=False).browse(rule_id)._to_route()
+
+    @api.model
+    def _route_min_amount(self, route, company_id, date=None):
+        """route.min_amount (in the rule's currency) converted to company_id's currency at date."""
+        return self.env["kh.approval.request"]._to_company_currency(
+            route.min_amount, route.currency_id, company_id, date
+        )
+
+    @api.model
+    def _resolve_route(self, company_id, department_id=False, amount=0.0):
+        """
+        Best active rule for a company/department/amount, or None.
+        amount is in the company's currency (see amount_company_currency); rule
+        thresholds are converted to it at today's rate.
+        Most specific wins: department rule over generic, company rule over global,
+        then the highest min_amount the amount reaches.
+        """
+        best, best_key = None, None
+        for route in self._get_routes(company_id):
+            if not route.steps:
+                continue
+            if route.department_id and route.department_id != department_id:
+                continue
+            min_amount = self._route_min_amount(route, company_id) if route.min_amount else 0.0
+            if min_amount and amount < min_amount:
+                continue
+            key = (bool(route.department_id), bool(route.company_id), min_amount, -route.id)
+            if best_key is None or key > best_key:
+                best, best_key = route, key
+        return best
 
 
 # ============================================================================
@@ -621,12 +1822,18 @@ class KhApprovalLine(models.Model):
     _order = "id"
     _check_company_auto = True
 
-    request_id = fields.Many2one("kh.approval.request", required=True, ondelete="cascade")
+    request_id = fields.Many2one("kh.approval.request", required=True, ondelete="cascade", index=True)
+    # Archived with their request (see kh.approval.request._archive_closed)
+    active = fields.Boolean(default=True)
     company_id = fields.Many2one(
         "res.company", related="request_id.company_id", store=True, index=True
     )
     name = fields.Char()
-    approver_id = fields.Many2one("res.users", required=True)
+    approver_id = fields.Many2one("res.users", required=True, index=True)
+    # Denormalized for the line record rule (no join to the request)
+    requester_id = fields.Many2one(
+        "res.users", related="request_id.requester_id", store=True, index=True, readonly=True
+    )
     required = fields.Boolean(default=True)
     state = fields.Selection(
         [
@@ -634,8 +1841,177 @@ class KhApprovalLine(models.Model):
             ("approved", "Approved"),
             ("rejected", "Rejected"),
             ("withdrawn", "Withdrawn"),  # (not used now, but kept for history)
+            ("skipped", "Not Needed"),  # parallel stage completed without this step
         ],
         default="pending",
         required=True,
     )
-    note = fields.Char()
\ No newline at end of file
+    note = fields.Char()
+    # Steps with the same stage are pending together; stage_quorum approvals complete it
+    stage = fields.Integer(default=1, required=True, readonly=True)
+    stage_quorum = fields.Integer(string="Approvals Needed", default=1, readonly=True)
+    # Cycle-time reporting (kh.approval.cycle.stats)
+    pending_since = fields.Datetime(string="Pending Since", readonly=True, copy=False)
+    decided_on = fields.Datetime(string="Decided On", readonly=True, copy=False)
+    # Reminders & escalation (kh.approval.request._cron_overdue)
+    reminded_on = fields.Datetime(string="Last Reminder", readonly=True, copy=False)
+    reminder_count = fields.Integer(string="Reminders", readonly=True, copy=False)
+    escalated_on = fields.Datetime(string="Escalated On", readonly=True, copy=False)
+    escalated_from_id = fields.Many2one("res.users", string="Escalated From", readonly=True, copy=False)
+
+    def init(self):
+        # Overdue scan (_cron_overdue): pending steps by age
+        create_index(
+            self.env.cr,
+            "kh_approval_line_pending_since_idx",
+            self._table,
+            ["pending_since"],
+            where="state = 'pending'",
+        )
+
+    def _snapshot(self):
+        """Plain-data copy of the steps (steps overview, archived requests)."""
+        return [{
+            "stage": line.stage,
+            "stage_quorum": line.stage_quorum,
+            "name": line.name or "",
+            "approver_id": line.approver_id.id,
+            "approver": line.approver_id.name or "",
+            "required": line.required,
+            "state": line.state,
+            "note": line.note or "",
+            "pending_since": fields.Datetime.to_string(line.pending_since) or False,
+            "decided_on": fields.Datetime.to_string(line.decided_on) or False,
+        } for line in self]
+
+    # -------------------------------------------------------------------------
+    # Reminders & escalation
+    # -------------------------------------------------------------------------
+    def _hours_pending(self, now):
+        self.ensure_one()
+        return int((now - self.pending_since).total_seconds() // 3600)
+
+    def _remind(self, now):
+        """Inbox reminder to the approver of each overdue step (once per request and approver)."""
+        calls, pairs = [], set()
+        for line in self:
+            rec, partner = line.request_id, line.approver_id.partner_id
+            if (rec.id, partner.id) in pairs:
+                continue
+            pairs.add((rec.id, partner.id))
+            calls.append((rec, {
+                "partner": partner,
+                "body_html": _(
+                    "⏰ <b>Reminder</b>: <a href='%(link)s'>%(name)s</a> has been waiting for your approval for %(hours)s hours."
+                ) % {"link": rec._deeplink(), "name": rec.name, "hours": line._hours_pending(now)},
+            }))
+        self.env["kh.approval.request"]._dispatch("_notify_partner", calls)
+        self.env["kh.approval.notify.log"]._log(pairs, kind="reminder")
+        by_count = defaultdict(lambda: self.browse())
+        for line in self:
+            by_count[line.reminder_count] |= line
+        for count, lines in by_count.items():
+            lines.write({"reminded_on": now, "reminder_count": count + 1})
+
+    def _escalate(self, now):
+        """
+        Hand each overdue step to its rule's backup approver: the step is
+        reassigned (the original approver keeps read access) and the backup
+        gets the To-Do. Steps without a usable backup alert the approval
+        managers of the request's company instead.
+        """
+        Request = self.env["kh.approval.request"].sudo()
+        reassign = defaultdict(lambda: self.browse())  # (backup, original approver) -> lines
+        alert = self.browse()
+        for line in self:
+            backup = line.request_id.rule_id.backup_approver_id
+            # A backup already deciding this stage would count twice towards its quorum
+            if backup and backup not in line.request_id.current_approver_ids:
+                reassign[(backup, line.approver_id)] |= line
+            else:
+                alert |= line
+
+        notes, calls, pairs = [], [], set()
+        hours = {line.id: line._hours_pending(now) for line in self}
+        released = defaultdict(set)  # request id -> original approver ids
+        for (backup, original), lines in reassign.items():
+            for line in lines:
+                released[line.request_id.id].add(original.id)
+                notes.append((line.request_id, {"body_html": _(
+                    "Step <b>%(step)s</b> escalated from %(from)s to %(to)s after %(hours)s hours."
+                ) % {"step": line.name, "from": original.name, "to": backup.name, "hours": hours[line.id]}}))
+            lines.write({
+                "approver_id": backup.id,
+                "escalated_from_id": original.id,
+                "escalated_on": now,
+                "reminded_on": False,
+                "reminder_count": 0,
+            })
+        requests = Request.browse(list(released))
+        if requests:
+            requests._unlink_todos(released)
+            if requests._activity_mode() == "digest":
+                requests._notify_digest("approval", {uid for uids in released.values() for uid in uids})
+            requests._notify_first_pending()
+
+        if alert:
+            managers = self.env.ref("kh_approvals.group_kh_approvals_manager").users
+            for line in alert:
+                rec = line.request_id
+                notes.append((rec, {"body_html": _(
+                    "Step <b>%(step)s</b> (%(approver)s) is overdue by %(hours)s hours; approval managers alerted."
+                ) % {"step": line.name, "approver": line.approver_id.name, "hours": hours[line.id]}}))
+                for manager in managers.filtered(lambda u: rec.company_id in u.company_ids):
+                    if (rec.id, manager.partner_id.id) in pairs:
+                        continue
+                    pairs.add((rec.id, manager.partner_id.id))
+                    calls.append((rec, {
+                        "partner": manager.partner_id,
+                        "body_html": _(
+                            "🚩 <b>Escalation</b>: step %(step)s of <a href='%(link)s'>%(name)s</a> "
+                            "has been waiting for %(approver)s for %(hours)s hours."
+                        ) % {
+                            "step": line.name, "link": rec._deeplink(), "name": rec.name,
+                            "approver": line.approver_id.name, "hours": hours[line.id],
+                        },
+                    }))
+            alert.write({"escalated_on": now})
+
+        Request._dispatch("_post_note", notes)
+        Request._dispatch("_notify_partner", calls)
+        self.env["kh.approval.notify.log"]._log(pairs, kind="escalation")
+
+    # -------------------------------------------------------------------------
+    # ORM overrides: steps move their request's current approver, which is
+    # part of the dashboard counters (kh.approval.counter).
+    # -------------------------------------------------------------------------
+    @api.model_create_multi
+    def create(self, vals_list):
+        Counter = self.env["kh.approval.counter"]
+        requests = self.env["kh.approval.request"].browse(
+            {vals["request_id"] for vals in vals_list if vals.get("request_id")}
+        )
+        before = Counter._snapshot(requests)
+        lines = super().create(vals_list)
+        Counter._apply_delta(before, Counter._snapshot(requests))
+        return lines
+
+    def write(self, vals):
+        if not {"state", "approver_id", "request_id"}.intersection(vals.keys()):
+            return super().write(vals)
+        Counter = self.env["kh.approval.counter"]
+        requests = self.sudo().request_id
+        if vals.get("request_id"):
+            requests |= requests.browse(vals["request_id"])
+        before = Counter._snapshot(requests)
+        res = super().write(vals)
+        Counter._apply_delta(before, Counter._snapshot(requests))
+        return res
+
+    def unlink(self):
+        Counter = self.env["kh.approval.counter"]
+        requests = self.sudo().request_id
+        before = Counter._snapshot(requests)
+        res = super().unlink()
+        Counter._apply_delta(before, Counter._snapshot(requests))
+        return res
\ No newline at end of file
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+
+from odoo import api, fields, models
+
+
+# Request columns a counter row is keyed by (amount is summed, not keyed).
+# currency_id is the company's currency: amounts are amount_company_currency.
+# A request counts once in the total row (current_approver_id empty, carries
+# the amount) and once per current approver (amount 0, so sums stay exact).
+COUNTER_KEY = ("company_id", "department_id", "state", "payment_state", "currency_id", "current_approver_id")
+
+
+# ============================================================================
+# Dashboard Counters
+# ============================================================================
+class KhApprovalCounter(models.Model):
+    """
+    Insert-only delta rows feeding the /kh_approvals/dashboard endpoint.
+
+    Every change to a request's key (company, department, state, payment state,
+    currency, current approvers) or amount appends -1/+1 rows; totals are the SUM
+    per key. Each request has a total row without approver plus one row per
+    current approver, so parallel stages count for every approver. Appending instead of updating keeps concurrent approvals from
+    fighting over the same counter row. A cron compacts the rows periodically,
+    and _rebuild() recomputes everything from the requests.
+    """
+    _name = "kh.approval.counter"
+    _description = "Approval Dashboard Counter"
+    _log_access = False
+
+    company_id = fields.Many2one("res.company", readonly=True, ondelete="cascade")
+    department_id = fields.Many2one("kh.approvals.department", readonly=True, ondelete="cascade")
+    state = fields.Char(readonly=True)
+    payment_state = fields.Char(readonly=True)
+    currency_id = fields.Many2one("res.currency", readonly=True, ondelete="cascade")
+    current_approver_id = fields.Many2one("res.users", readonly=True, ondelete="cascade")
+    request_count = fields.Integer(readonly=True)
+    amount = fields.Float(readonly=True)
+
+    # -------------------------------------------------------------------------
+    # Incremental maintenance
+    # -------------------------------------------------------------------------
+    @api.model
+    def _snapshot(self, requests):
+        """
+        {request id: (key, amount, approver ids)} for the given kh.approval.request
+        records; key is COUNTER_KEY without the approver.
+        """
+        snapshot = {}
+        for rec in requests.sudo():
+            key = (
+                rec.company_id.id or None,
+                rec.department_id.id or None,
+                rec.state or None,
+                rec.payment_state or None,
+                rec.company_id.currency_id.id or None,
+            )
+            snapshot[rec.id] = (key, rec.amount_company_currency or 0.0, tuple(sorted(rec.current_approver_ids.ids)))
+        return snapshot
+
+    @api.model
+    def _apply_delta(self, before, after):
+        """Append the difference between two snapshots (see _snapshot)."""
+        deltas = defaultdict(lambda: [0, 0.0])
+        for snapshot, sign in ((before, -1), (after, 1)):
+            for rec_id, (key, amount, approver_ids) in snapshot.items():
+                other = after if sign < 0 else before
+                if other.get(rec_id) == (key, amount, approver_ids):
+                    continue
+                deltas[key + (None,)][0] += sign
+                deltas[key + (None,)][1] += sign * amount
+                for approver_id in approver_ids:
+                    deltas[key + (approver_id,)][0] += sign
+        rows = [key + tuple(value) for key, value in deltas.items() if value[0] or value[1]]
+        if not rows:
+            return
+        columns = ", ".join(COUNTER_KEY + ("request_count", "amount"))
+        placeholders = ", ".join(["%s"] * len(rows))
+        self.env.cr.execute(
+            f"INSERT INTO {self._table} ({columns}) VALUES {placeholders}", rows
+        )
+
+    # -------------------------------------------------------------------------
+    # Maintenance (cron / recovery)
+    # -------------------------------------------------------------------------
+    @api.model
+    def _cron_compact(self):
+        """Collapse the delta rows into one row per key."""
+        key = ", ".join(COUNTER_KEY)
+        self.env.cr.execute(f"""
+            WITH moved AS (
+                DELETE FROM {self._table}
+                 RETURNING {key}, request_count, amount
+            )
+            INSERT INTO {self._table} ({key}, request_count, amount)
+                 SELECT {key}, SUM(request_count), SUM(amount)
+                   FROM moved
+               GROUP BY {key}
+                 HAVING SUM(request_count) <> 0 OR SUM(amount) <> 0
+        """)
+        return True
+
+    @api.model
+    def _rebuild(self):
+        """
+        Recompute all counters from kh.approval.request (recovery command).
+        Rows appended by transactions not visible to this one are left alone,
+        so concurrent changes are not lost.
+        """
+        self.env["kh.approval.request"].flush_model()
+        key = ", ".join(COUNTER_KEY)
+        self.env.cr.execute(f"DELETE FROM {self._table}")
+        self.env.cr.execute(f"""
+            INSERT INTO {self._table} ({key}, request_count, amount)
+                 SELECT r.company_id, r.department_id, r.state, r.payment_state, c.currency_id,
+                        NULL, COUNT(*), COALESCE(SUM(r.amount_company_currency), 0)
+                   FROM kh_approval_request r
+              LEFT JOIN res_company c ON c.id = r.company_id
+               GROUP BY r.company_id, r.department_id, r.state, r.payment_state, c.currency_id
+              UNION ALL
+                 SELECT r.company_id, r.department_id, r.state, r.payment_state, c.currency_id,
+                        a.user_id, COUNT(*), 0
+                   FROM kh_approval_request r
+                   JOIN kh_approval_request_current_approver_rel a ON a.request_id = r.id
+              LEFT JOIN res_company c ON c.id = r.company_id
+               GROUP BY r.company_id, r.department_id, r.state, r.payment_state, c.currency_id,
+                        a.user_id
+        """)
+        return True
+
+    # -------------------------------------------------------------------------
+    # Dashboard payload
+    # -------------------------------------------------------------------------
+    @api.model
+    def _totals(self):
+        key = ", ".join(COUNTER_KEY)
+        self.env.cr.execute(f"""
+            SELECT {key}, SUM(request_count), SUM(amount)
+              FROM {self._table}
+          GROUP BY {key}
+            HAVING SUM(request_count) <> 0
+        """)
+        return self.env.cr.fetchall()
+
+    @api.model
+    def _dashboard_data(self):
+        """Current user's queues, plus company/department/state/approver aggregates for managers."""
+        env = self.env
+        Request = env["kh.approval.request"]
+        uid = env.uid
+        data = {
+            "my_queue": {
+                "to_approve": Request.search_count([("current_approver_ids", "in", [uid])]),
+                "my_requests": {
+                    state: count
+                    for state, count in Request._read_group(
+                        [("requester_id", "=", uid)], ["state"], ["__count"]
+                    )
+                },
+            },
+        }
+        if not env.user.has_group("kh_approvals.group_kh_approvals_manager"):
+            return data
+
+        # Only aggregate over the companies the user is working in
+        company_ids = set(env.companies.ids)
+        by_company = defaultdict(int)
+        by_department = defaultdict(int)
+        by_state = defaultdict(int)
+        by_approver = defaultdict(int)
+        amounts = defaultdict(float)  # (currency, payment_state) -> amount
+        for company_id, department_id, state, payment_state, currency_id, approver_id, count, amount in self._totals():
+            if company_id and company_id not in company_ids:
+                continue
+            if approver_id:
+                by_approver[approver_id] += count
+                continue
+            # Total row: each request once, with its amount
+            by_company[company_id] += count
+            by_department[department_id] += count
+            by_state[state] += count
+            if state == "approved":
+                amounts[(currency_id, payment_state)] += amount
+
+        def names(model, ids):
+            records = env[model].sudo().browse([i for i in ids if i])
+            return {rec.id: rec.display_name for rec in records}
+
+        companies = names("res.company", by_company)
+        departments = names("kh.approvals.department", by_department)
+        approvers = names("res.users", by_approver)
+        currencies = names("res.currency", {c for c, _p in amounts})
+        data["totals"] = {
+            "by_company": [
+                {"id": cid or False, "name": companies.get(cid, ""), "count": n} for cid, n in by_company.items()
+            ],
+            "by_department": [
+                {"id": did or False, "name": departments.get(did, ""), "count": n} for did, n in by_department.items()
+            ],
+            "by_state": dict(by_state),
+            "by_approver": [
+                {"id": aid, "name": approvers.get(aid, ""), "count": n} for aid, n in by_approver.items()
+            ],
+            "approved_amounts": [
+                {"currency": currencies.get(cid, ""), "payment_state": pstate, "amount": amount}
+                for (cid, pstate), amount in amounts.items()
+            ],
+        }
+        return data
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+
+from odoo import api, fields, models, tools, _
+
+# Requests listed in a digest note; the rest is summarized as a count
+DIGEST_LIMIT = 50
+
+
+# ============================================================================
+# Approval Digest (one rolling activity per user and queue)
+# ============================================================================
+class KhApprovalDigest(models.Model):
+    """
+    Digest mode (System Parameter kh.approval.activity_mode = 'digest'):
+    instead of one To-Do per request, each approver (and the payment user)
+    gets ONE activity on their digest, listing their whole queue. The
+    activity is updated in place when the queue changes and by a cron, and
+    removed when the queue is empty.
+    """
+    _name = "kh.approval.digest"
+    _description = "Approval Digest"
+    _inherit = ["mail.activity.mixin"]
+    _order = "user_id, kind"
+
+    user_id = fields.Many2one("res.users", required=True, ondelete="cascade", readonly=True)
+    kind = fields.Selection(
+        [
+            ("approval", "Approvals Waiting"),
+            ("payment", "Payments Waiting"),
+        ],
+        required=True,
+        readonly=True,
+    )
+    request_count = fields.Integer(string="Requests", readonly=True)
+    body = fields.Html(string="Queue", readonly=True, sanitize=False)
+
+    _sql_constraints = [
+        ("user_kind_uniq", "unique(user_id, kind)", "A user has one digest per queue."),
+    ]
+
+    @api.depends("user_id", "kind")
+    def _compute_display_name(self):
+        labels = dict(self._fields["kind"]._description_selection(self.env))
+        for rec in self:
+            rec.display_name = f"{labels.get(rec.kind, '')}: {rec.user_id.name or ''}"
+
+    # -------------------------------------------------------------------------
+    # Queues
+    # -------------------------------------------------------------------------
+    @api.model
+    def _queues(self, kind, user_ids):
+        """{user id: kh.approval.request records} waiting for each user, oldest first."""
+        Request = self.env["kh.approval.request"].sudo()
+        queues = defaultdict(lambda: Request)
+        if kind == "approval":
+            requests = Request.search_fetch(
+                [("state", "=", "in_review"), ("current_approver_ids", "in", list(user_ids))],
+                ["name", "title", "current_approver_ids"],
+                order="submitted_on, id",
+            )
+            for rec in requests:
+                for user_id in rec.current_approver_ids.ids:
+                    if user_id in user_ids:
+                        queues[user_id] |= rec
+        else:
+            requests = Request.search_fetch(
+                [("state", "=", "approved"), ("payment_state", "=", "not_paid"), ("amount", ">", 0)],
+                ["name", "title"],
+                order="id",
+            )
+            for user_id in user_ids:
+                queues[user_id] = requests
+        return queues
+
+    def _render_body(self, requests):
+        items = "".join(
+            f"<li><a href='{rec._deeplink()}'>{tools.html_escape(rec.name)}: {tools.html_escape(rec.title or '')}</a></li>"
+            for rec in requests[:DIGEST_LIMIT]
+        )
+        more = ""
+        if len(requests) > DIGEST_LIMIT:
+            more = "<p>%s</p>" % (_("…and %s more.") % (len(requests) - DIGEST_LIMIT))
+        return f"<ul>{items}</ul>{more}"
+
+    # -------------------------------------------------------------------------
+    # Refresh
+    # -------------------------------------------------------------------------
+    @api.model
+    def _refresh(self, kind, user_ids):
+        """
+        Bring the digests of the given users up to date: one search for all
+        their queues, one create for the missing activities, in-place writes
+        for the others, one unlink for the emptied ones.
+        """
+        user_ids = {user_id for user_id in user_ids if user_id}
+        if not user_ids:
+            return
+        queues = self._queues(kind, user_ids)
+        Digest = self.sudo()
+        digests = {
+            digest.user_id.id: digest
+            for digest in Digest.search([("kind", "=", kind), ("user_id", "in", list(user_ids))])
+        }
+        missing = [user_id for user_id in user_ids if user_id not in digests and queues.get(user_id)]
+        for digest in Digest.create([{"user_id": user_id, "kind": kind} for user_id in missing]):
+            digests[digest.user_id.id] = digest
+
+        todo_type = self.env.ref("mail.mail_activity_data_todo")
+        labels = dict(self._fields["kind"]._description_selection(self.env))
+        to_create, to_unlink = [], self.env["mail.activity"].sudo()
+        for user_id, digest in digests.items():
+            queue = queues.get(user_id) or self.env["kh.approval.request"]
+            activity = digest.activity_ids[:1]
+            to_unlink |= digest.activity_ids[1:]
+            body = digest._render_body(queue) if queue else False
+            digest.write({"request_count": len(queue), "body": body})
+            if not queue:
+                to_unlink |= activity
+                continue
+            summary = _("%(label)s: %(count)s") % {"label": labels[kind], "count": len(queue)}
+            if activity:
+                activity.write({"summary": summary, "note": body})
+            else:
+                to_create.append({
+                    "res_model_id": self.env["ir.model"]._get_id(self._name),
+                    "res_id": digest.id,
+                    "activity_type_id": todo_type.id,
+                    "automated": True,
+                    "date_deadline": todo_type._get_date_deadline(),
+                    "user_id": user_id,
+                    "summary": summary,
+                    "note": body,
+                })
+        if to_create:
+            self.env["mail.activity"].sudo().create(to_create)
+        if to_unlink:
+            to_unlink.unlink()
+
+    @api.model
+    def _cron_refresh(self):
+        """Scheduled refresh of every digest (and of the users who should have one)."""
+        if self.env["kh.approval.request"]._activity_mode() != "digest":
+            return True
+        Request = self.env["kh.approval.request"].sudo()
+        approvers = {
+            user.id
+            for [user] in Request._read_group([("state", "=", "in_review")], ["current_approver_ids"])
+            if user
+        }
+        existing = self.sudo().search([])
+        self._refresh("approval", approvers | set(existing.filtered(lambda d: d.kind == "approval").user_id.ids))
+        payment_user = Request._payment_user()
+        self._refresh("payment", set(payment_user.ids) | set(existing.filtered(lambda d: d.kind == "payment").user_id.ids))
+        return True
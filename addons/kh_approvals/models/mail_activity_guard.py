@@ -1,42 +1,66 @@
 # -*- coding: utf-8 -*-
-from odoo import api, models, _
+from odoo import api, models, tools, _
 from odoo.exceptions import UserError
 
+from .perf_log import instrumented
+
 class MailActivity(models.Model):
     _inherit = 'mail.activity'
 
     # --- Config knobs ---
-    def _kh_guard_excluded_models(self):
-        param = self.env['ir.config_parameter'].sudo().get_param(
-            'kh_approvals.activity_guard_exclude_models', ''
-        ) or ''
-        return {m.strip() for m in param.split(',') if m.strip()}
+    @api.model
+    @tools.ormcache()
+    def _kh_guard_scope(self):
+        """
+        (guarded models, excluded models) from System Parameters:
+        - kh_approvals.activity_guard_models: comma-separated list of guarded
+          models (default: '*', every model)
+        - kh_approvals.activity_guard_exclude_models: comma-separated exclusions
+        Cached; the cache is cleared whenever a System Parameter changes.
+        """
+        icp = self.env['ir.config_parameter'].sudo()
+
+        def parse(param):
+            return frozenset(m.strip() for m in (param or '').split(',') if m.strip())
+
+        included = icp.get_param('kh_approvals.activity_guard_models', '*') or ''
+        excluded = icp.get_param('kh_approvals.activity_guard_exclude_models', '')
+        return (None if included.strip() == '*' else parse(included)), parse(excluded)
 
     def _kh_guard_enabled(self):
         if self.env.context.get('kh_activity_guard_bypass'):
             return False
         return True
 
+    @instrumented("mail.activity guard")
     def _kh_check_permission(self, action):
         """
         Guard for activity actions.
         - 'done': Can only be performed by the assigned user.
         - 'write', 'unlink': Can only be performed by the activity creator.
         Managers and superusers are always allowed.
+        Activities on models outside the configured scope are skipped up front.
         """
-        if not self._kh_guard_enabled():
+        if not self._kh_guard_enabled() or self.env.is_superuser():
             return
 
-        user = self.env.user
-        if self.env.is_superuser() or user.has_group('kh_approvals.group_kh_approvals_manager'):
+        included, excluded = self._kh_guard_scope()
+        if included is not None and not included:
             return
 
-        excluded = self._kh_guard_excluded_models()
+        # One batched read for model, assignee and creator of all activities
+        self.sudo().fetch(['res_model', 'user_id', 'create_uid'])
+        guarded = self.filtered(
+            lambda a: (included is None or a.res_model in included) and a.res_model not in excluded
+        )
+        if not guarded:
+            return
 
-        for act in self:
-            if act.res_model in excluded:
-                continue
+        user = self.env.user
+        if user.has_group('kh_approvals.group_kh_approvals_manager'):
+            return
 
+        for act in guarded:
             if action == 'done':
                 if not act.user_id:
                     raise UserError(_("This activity is not assigned to anyone and cannot be marked as done."))
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+from odoo.tools.sql import create_index
+
+
+# ============================================================================
+# Notification Ledger (append-only)
+# ============================================================================
+class KhApprovalNotifyLog(models.Model):
+    """
+    One row per notification sent for a request. Used by the chatter ping
+    throttle in kh.approval.request._notify_first_pending (see _recent_pairs)
+    and any other dedup logic, instead of scanning mail.message bodies.
+    """
+    _name = "kh.approval.notify.log"
+    _description = "Approval Notification Ledger"
+    _order = "notified_on desc, id desc"
+    _log_access = False
+
+    request_id = fields.Many2one(
+        "kh.approval.request", required=True, ondelete="cascade", readonly=True
+    )
+    partner_id = fields.Many2one(
+        "res.partner", required=True, ondelete="cascade", readonly=True
+    )
+    kind = fields.Selection(
+        [
+            ("approval_needed", "Approval Needed"),
+            ("reminder", "Reminder"),
+            ("escalation", "Escalation"),
+        ],
+        required=True,
+        default="approval_needed",
+        readonly=True,
+    )
+    notified_on = fields.Datetime(
+        required=True, default=fields.Datetime.now, readonly=True
+    )
+
+    def init(self):
+        # Composite index matching the throttle lookup (request, partner, kind, time window)
+        create_index(
+            self.env.cr,
+            "kh_approval_notify_log_lookup_idx",
+            self._table,
+            ["request_id", "partner_id", "kind", "notified_on"],
+        )
+        # Retention purge scans by date only
+        create_index(
+            self.env.cr,
+            "kh_approval_notify_log_notified_on_idx",
+            self._table,
+            ["notified_on"],
+        )
+
+    def write(self, vals):
+        raise UserError(_("The notification ledger is append-only."))
+
+    # -------------------------------------------------------------------------
+    # Config
+    # -------------------------------------------------------------------------
+    @api.model
+    def _throttle_minutes(self):
+        """Throttle window, System Parameter kh.approval.notify_throttle_minutes (default 10)."""
+        icp = self.env['ir.config_parameter'].sudo()
+        try:
+            return int(icp.get_param('kh.approval.notify_throttle_minutes', 10))
+        except (TypeError, ValueError):
+            return 10
+
+    @api.model
+    def _retention_days(self):
+        """Rows older than this are purged, System Parameter kh.approval.notify_log_retention_days (default 30)."""
+        icp = self.env['ir.config_parameter'].sudo()
+        try:
+            return int(icp.get_param('kh.approval.notify_log_retention_days', 30))
+        except (TypeError, ValueError):
+            return 30
+
+    # -------------------------------------------------------------------------
+    # API
+    # -------------------------------------------------------------------------
+    @api.model
+    def _log(self, pairs, kind="approval_needed"):
+        """Append one row per (request_id, partner_id) pair."""
+        now = fields.Datetime.now()
+        vals_list = [
+            {"request_id": request_id, "partner_id": partner_id, "kind": kind, "notified_on": now}
+            for request_id, partner_id in pairs
+        ]
+        return self.sudo().create(vals_list) if vals_list else self.browse()
+
+    @api.model
+    def _recent_pairs(self, request_ids, kind="approval_needed", minutes=None):
+        """Return the set of (request_id, partner_id) notified within the throttle window."""
+        if not request_ids:
+            return set()
+        if minutes is None:
+            minutes = self._throttle_minutes()
+        cutoff = fields.Datetime.subtract(fields.Datetime.now(), minutes=minutes)
+        self.env.cr.execute(
+            f"""
+            SELECT DISTINCT request_id, partner_id
+              FROM {self._table}
+             WHERE request_id = ANY(%s)
+               AND kind = %s
+               AND notified_on >= %s
+            """,
+            [list(request_ids), kind, cutoff],
+        )
+        return set(self.env.cr.fetchall())
+
+    # -------------------------------------------------------------------------
+    # Cron
+    # -------------------------------------------------------------------------
+    @api.model
+    def _cron_purge(self):
+        """Delete ledger rows older than the retention period."""
+        cutoff = fields.Datetime.subtract(fields.Datetime.now(), days=self._retention_days())
+        # Plain DELETE: the ledger has no dependents and can grow large.
+        self.env.cr.execute(
+            f"DELETE FROM {self._table} WHERE notified_on < %s", [cutoff]
+        )
+        return True
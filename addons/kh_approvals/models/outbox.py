@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import logging
+from collections import defaultdict
+
+from markupsafe import Markup
+
+from odoo import api, fields, models
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+# kh.approval.request methods the outbox may replay, and whether they run on a
+# whole recordset (True) or must be called record by record (False).
+OUTBOX_METHODS = {
+    "_post_note": True,
+    "_notify_partner": False,
+    "_notify_first_pending": True,
+    "_notify_payment_user": True,
+    "_notify_digest": True,
+}
+MAX_ATTEMPTS = 5
+
+
+# ============================================================================
+# Notification Outbox
+# ============================================================================
+class KhApprovalOutbox(models.Model):
+    """
+    Notification intents (chatter notes, inbox pings, follower/activity fan-out)
+    queued by state transitions when System Parameter
+    kh.approval.notification_mode = 'deferred', and drained by a cron.
+    """
+    _name = "kh.approval.outbox"
+    _description = "Approval Notification Outbox"
+    _order = "partner_id, id"
+    _log_access = False
+
+    request_id = fields.Many2one("kh.approval.request", required=True, ondelete="cascade", readonly=True)
+    method = fields.Char(required=True, readonly=True)
+    payload = fields.Json(readonly=True)
+    user_id = fields.Many2one("res.users", string="Acting User", ondelete="cascade", readonly=True)
+    partner_id = fields.Many2one("res.partner", string="Recipient", ondelete="cascade", readonly=True)
+    dedupe_key = fields.Char(readonly=True)
+    state = fields.Selection(
+        [
+            ("pending", "Pending"),
+            ("failed", "Failed"),
+        ],
+        default="pending",
+        required=True,
+        readonly=True,
+    )
+    attempts = fields.Integer(readonly=True)
+    enqueued_on = fields.Datetime(default=fields.Datetime.now, readonly=True)
+    next_attempt_on = fields.Datetime(default=fields.Datetime.now, readonly=True)
+    last_error = fields.Text(readonly=True)
+
+    def init(self):
+        # Identical pending intents of the same transition are queued once
+        create_index(
+            self.env.cr,
+            "kh_approval_outbox_dedupe_idx",
+            self._table,
+            ["dedupe_key"],
+            unique=True,
+            where="state = 'pending'",
+        )
+        create_index(
+            self.env.cr,
+            "kh_approval_outbox_due_idx",
+            self._table,
+            ["next_attempt_on"],
+            where="state = 'pending'",
+        )
+
+    # -------------------------------------------------------------------------
+    # Enqueue
+    # -------------------------------------------------------------------------
+    @api.model
+    def _serialize(self, kwargs):
+        payload = {"kwargs": {}, "markup": [], "records": {}}
+        for key, value in kwargs.items():
+            if isinstance(value, models.BaseModel):
+                payload["records"][key] = [value._name, value.ids]
+            elif isinstance(value, Markup):
+                payload["markup"].append(key)
+                payload["kwargs"][key] = str(value)
+            else:
+                payload["kwargs"][key] = value
+        return payload
+
+    @api.model
+    def _deserialize(self, payload):
+        kwargs = dict(payload.get("kwargs") or {})
+        for key in payload.get("markup") or []:
+            kwargs[key] = Markup(kwargs[key])
+        for key, (model, ids) in (payload.get("records") or {}).items():
+            kwargs[key] = self.env[model].browse(ids)
+        return kwargs
+
+    @api.model
+    def _transition(self, rec):
+        """
+        Where the request stands in its workflow: revision, state and number of
+        decided steps. Part of the dedupe key, so the same intent queued again
+        by a later transition (e.g. after revise and resubmit) is kept.
+        """
+        decided = len(rec.sudo().approval_line_ids.filtered(lambda l: l.state != "pending"))
+        return f"{rec.revision}|{rec.state}|{decided}"
+
+    @api.model
+    def _enqueue(self, method, calls):
+        """
+        Queue method calls on requests in one INSERT.
+        calls: iterable of (kh.approval.request records, kwargs dict).
+        """
+        if method not in OUTBOX_METHODS:
+            raise ValueError(f"{method} cannot be deferred")
+        now = fields.Datetime.now()
+        rows = []
+        for records, kwargs in calls:
+            payload = self._serialize(kwargs)
+            payload_json = json.dumps(payload, sort_keys=True)
+            for rec in records:
+                partner = kwargs.get("partner") or self.env["res.partner"].browse(
+                    (kwargs.get("partner_ids") or [None])[0]
+                ) or rec.current_approver_id.partner_id
+                key = hashlib.sha1(
+                    f"{rec.id}|{self._transition(rec)}|{method}|{self.env.uid}|{payload_json}".encode()
+                ).hexdigest()
+                rows.append((rec.id, method, payload_json, self.env.uid, partner.id or None, key, now, now))
+        if not rows:
+            return
+        self.env.cr.execute(
+            f"""
+            INSERT INTO {self._table}
+                   (request_id, method, payload, user_id, partner_id, dedupe_key,
+                    enqueued_on, next_attempt_on, state, attempts)
+            VALUES {", ".join(["(%s, %s, %s::jsonb, %s, %s, %s, %s, %s, 'pending', 0)"] * len(rows))}
+            ON CONFLICT DO NOTHING
+            """,
+            [value for row in rows for value in row],
+        )
+        cron = self.env.ref("kh_approvals.ir_cron_kh_outbox_process", raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    # -------------------------------------------------------------------------
+    # Cron worker
+    # -------------------------------------------------------------------------
+    @api.model
+    def _cron_process(self, batch_size=200):
+        """Drain due intents in batches, grouped by recipient; commit after each batch."""
+        cr = self.env.cr
+        while True:
+            cr.execute(
+                f"""
+                SELECT id FROM {self._table}
+                 WHERE state = 'pending' AND next_attempt_on <= %s
+              ORDER BY partner_id, id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+                """,
+                [fields.Datetime.now(), batch_size],
+            )
+            ids = [row[0] for row in cr.fetchall()]
+            if not ids:
+                break
+            self.browse(ids)._process()
+            if not self.env.registry.in_test_mode():
+                cr.commit()
+            if len(ids) < batch_size:
+                break
+        return True
+
+    def _process(self):
+        """Replay the intents; identical calls are merged into one call on all their requests."""
+        groups = defaultdict(lambda: self.browse())
+        for row in self:
+            groups[(row.method, row.user_id, json.dumps(row.payload, sort_keys=True))] |= row
+
+        done = self.browse()
+        for (method, user, _payload), rows in groups.items():
+            requests = rows.request_id.with_context(kh_outbox_sync=True)
+            requests = requests.with_user(user) if user.active else requests.sudo()
+            kwargs = self._deserialize(rows[0].payload)
+            try:
+                with self.env.cr.savepoint():
+                    if OUTBOX_METHODS.get(method):
+                        getattr(requests, method)(**kwargs)
+                    else:
+                        for rec in requests:
+                            getattr(rec, method)(**kwargs)
+                done |= rows
+            except Exception as e:
+                _logger.warning("Approval outbox: %s failed for %s: %s", method, rows.request_id.ids, e)
+                rows._schedule_retry(str(e))
+        done.unlink()
+
+    def _schedule_retry(self, error):
+        """Exponential backoff (2, 4, 8... minutes); give up after MAX_ATTEMPTS."""
+        now = fields.Datetime.now()
+        for row in self:
+            attempts = row.attempts + 1
+            row.write({
+                "attempts": attempts,
+                "last_error": error,
+                "state": "failed" if attempts >= MAX_ATTEMPTS else "pending",
+                "next_attempt_on": fields.Datetime.add(now, minutes=2 ** attempts),
+            })
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import functools
+import random
+import threading
+import time
+
+from odoo import api, fields, models
+
+
+def instrumented(operation):
+    """
+    Sample calls of a recordset method into kh.approval.perf.log (wall time,
+    SQL query count and time, recordset size). With the sample rate at 0 the
+    only overhead is one cached System Parameter lookup.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            PerfLog = self.env["kh.approval.perf.log"]
+            rate = PerfLog._sample_rate()
+            if not rate or random.random() >= rate:
+                return method(self, *args, **kwargs)
+
+            cr = self.env.cr
+            thread = threading.current_thread()
+            queries = cr.sql_log_count
+            query_time = getattr(thread, "query_time", None)
+            start = time.perf_counter()
+            result = method(self, *args, **kwargs)
+            duration = time.perf_counter() - start
+            PerfLog._record(
+                operation,
+                self._name,
+                len(self),
+                duration,
+                cr.sql_log_count - queries,
+                getattr(thread, "query_time", 0.0) - query_time if query_time is not None else None,
+            )
+            return result
+        return wrapper
+    return decorator
+
+
+# ============================================================================
+# Performance Log (sampled)
+# ============================================================================
+class KhApprovalPerfLog(models.Model):
+    """
+    Sampled timings of the approval hot paths (see instrumented()). Opt-in:
+    System Parameter kh.approval.perf_sample_rate, between 0 (off, default)
+    and 1 (every call). Rows are written with plain SQL and purged after
+    kh.approval.perf_log_retention_days (default 14).
+    """
+    _name = "kh.approval.perf.log"
+    _description = "Approval Performance Log"
+    _order = "logged_on desc, id desc"
+    _log_access = False
+
+    operation = fields.Char(required=True, readonly=True, index=True)
+    model = fields.Char(readonly=True)
+    record_count = fields.Integer(string="Records", readonly=True, aggregator="avg")
+    duration_ms = fields.Float(string="Wall Time (ms)", readonly=True, aggregator="avg")
+    query_count = fields.Integer(string="Queries", readonly=True, aggregator="avg")
+    query_ms = fields.Float(string="SQL Time (ms)", readonly=True, aggregator="avg")
+    user_id = fields.Many2one("res.users", string="User", readonly=True, ondelete="set null")
+    logged_on = fields.Datetime(required=True, readonly=True, index=True)
+
+    # -------------------------------------------------------------------------
+    # Config
+    # -------------------------------------------------------------------------
+    @api.model
+    def _sample_rate(self):
+        icp = self.env['ir.config_parameter'].sudo()
+        try:
+            return min(max(float(icp.get_param('kh.approval.perf_sample_rate', 0) or 0), 0.0), 1.0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    @api.model
+    def _retention_days(self):
+        """Rows older than this are purged, System Parameter kh.approval.perf_log_retention_days (default 14)."""
+        icp = self.env['ir.config_parameter'].sudo()
+        try:
+            return int(icp.get_param('kh.approval.perf_log_retention_days', 14))
+        except (TypeError, ValueError):
+            return 14
+
+    # -------------------------------------------------------------------------
+    # API
+    # -------------------------------------------------------------------------
+    @api.model
+    def _record(self, operation, model, record_count, duration, query_count, query_time=None):
+        """Append one sample (durations in seconds); plain INSERT, no ORM overhead."""
+        self.env.cr.execute(
+            f"""
+            INSERT INTO {self._table}
+                   (operation, model, record_count, duration_ms, query_count, query_ms, user_id, logged_on)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, (now() at time zone 'UTC'))
+            """,
+            [
+                operation, model, record_count, round(duration * 1000.0, 3), query_count,
+                round(query_time * 1000.0, 3) if query_time is not None else None, self.env.uid,
+            ],
+        )
+
+    # -------------------------------------------------------------------------
+    # Cron
+    # -------------------------------------------------------------------------
+    @api.model
+    def _cron_purge(self):
+        """Delete samples older than the retention period."""
+        cutoff = fields.Datetime.subtract(fields.Datetime.now(), days=self._retention_days())
+        self.env.cr.execute(f"DELETE FROM {self._table} WHERE logged_on < %s", [cutoff])
+        return True
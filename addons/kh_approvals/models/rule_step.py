@@ -1,5 +1,80 @@
 # -*- coding: utf-8 -*-
-from odoo import fields, models
+from odoo import api, fields, models, _
+from odoo.exceptions import ValidationError
+
+
+class KhApprovalRuleStage(models.Model):
+    """
+    Parallel stage of a rule: all its steps become pending together, and the
+    stage completes when all of them, any one of them, or a minimum number of
+    them approve. Steps without a stage run on their own, in sequence.
+    """
+    _name = "kh.approval.rule.stage"
+    _description = "Approval Rule Stage"
+    _order = "sequence, id"
+
+    rule_id = fields.Many2one(
+        "kh.approval.rule",
+        string="Rule",
+        required=True,
+        ondelete="cascade",
+        index=True,
+    )
+    sequence = fields.Integer(default=10, required=True)
+    name = fields.Char(string="Stage Name", required=True)
+    quorum = fields.Selection(
+        [
+            ("all", "All Approvers"),
+            ("any", "Any Approver"),
+            ("count", "Minimum Number"),
+        ],
+        required=True,
+        default="all",
+    )
+    min_approvals = fields.Integer(string="Minimum Approvals", default=1)
+    step_ids = fields.One2many("kh.approval.rule.step", "stage_id", string="Steps")
+
+    @api.constrains("quorum", "min_approvals")
+    def _check_min_approvals(self):
+        for stage in self:
+            if stage.quorum == "count" and stage.min_approvals < 1:
+                raise ValidationError(_("A stage needs at least one approval."))
+
+    def _quorum_count(self, size):
+        """Approvals needed to complete this stage when it has `size` approvers."""
+        self.ensure_one()
+        if self.quorum == "any":
+            return 1
+        if self.quorum == "count":
+            return min(self.min_approvals, size)
+        return size
+
+    # Stages are compiled into rule versions, like steps; the name is not part of the route
+    _ROUTE_FIELDS = frozenset({"rule_id", "sequence", "quorum", "min_approvals"})
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        stages = super().create(vals_list)
+        stages.rule_id._compile_route()
+        self.env.registry.clear_cache()
+        return stages
+
+    def write(self, vals):
+        if not self._ROUTE_FIELDS.intersection(vals):
+            return super().write(vals)
+        rules = self.rule_id
+        res = super().write(vals)
+        (rules | self.rule_id)._compile_route()
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        rules = self.rule_id
+        res = super().unlink()
+        rules._compile_route()
+        self.env.registry.clear_cache()
+        return res
+
 
 class KhApprovalRuleStep(models.Model):
     _name = "kh.approval.rule.step"
@@ -16,3 +91,38 @@ class KhApprovalRuleStep(models.Model):
     sequence = fields.Integer(default=10, required=True)
     name = fields.Char(string="Step Name")
     approver_id = fields.Many2one("res.users", string="Approver", required=True)
+    stage_id = fields.Many2one(
+        "kh.approval.rule.stage",
+        string="Parallel Stage",
+        domain="[('rule_id', '=', rule_id)]",
+        ondelete="set null",
+        help="Steps sharing a stage are pending at the same time. Leave empty to run this step on its own.",
+    )
+
+    # Steps are compiled into rule versions and the cached rule index
+    # (kh.approval.rule._compile_route / _get_routes). The route keeps the step
+    # order and name (the generated lines' label).
+    _ROUTE_FIELDS = frozenset({"rule_id", "sequence", "name", "approver_id", "stage_id"})
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        steps = super().create(vals_list)
+        steps.rule_id._compile_route()
+        self.env.registry.clear_cache()
+        return steps
+
+    def write(self, vals):
+        if not self._ROUTE_FIELDS.intersection(vals):
+            return super().write(vals)
+        rules = self.rule_id
+        res = super().write(vals)
+        (rules | self.rule_id)._compile_route()
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        rules = self.rule_id
+        res = super().unlink()
+        rules._compile_route()
+        self.env.registry.clear_cache()
+        return res
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+
+# ============================================================================
+# Approval Rule Version (compiled route, immutable)
+# ============================================================================
+class KhApprovalRuleVersion(models.Model):
+    """
+    Compiled route of a kh.approval.rule: its ordered approvers and step names,
+    plus the guardrails in effect. A new version is saved whenever a rule or one
+    of its steps changes; requests record the version they were routed with.
+    """
+    _name = "kh.approval.rule.version"
+    _description = "Approval Rule Version"
+    _order = "rule_id, version desc"
+
+    rule_id = fields.Many2one(
+        "kh.approval.rule", required=True, ondelete="cascade", index=True, readonly=True
+    )
+    version = fields.Integer(required=True, readonly=True)
+    # [[approver_id, step name, stage, quorum], ...] in approval order
+    # (versions saved before parallel stages: [[approver_id, step name], ...])
+    route = fields.Json(required=True, readonly=True)
+    company_id = fields.Many2one("res.company", readonly=True)
+    department_id = fields.Many2one("kh.approvals.department", readonly=True)
+    min_amount = fields.Monetary(currency_field="currency_id", readonly=True)
+    currency_id = fields.Many2one("res.currency", readonly=True)
+    route_summary = fields.Char(string="Approvers", compute="_compute_route_summary")
+
+    _sql_constraints = [
+        ("rule_version_uniq", "unique(rule_id, version)", "A rule version can only be saved once."),
+    ]
+
+    @api.depends("rule_id.name", "version")
+    def _compute_display_name(self):
+        for rec in self:
+            rec.display_name = f"{rec.rule_id.name} v{rec.version}"
+
+    @api.depends("route")
+    def _compute_route_summary(self):
+        """Stages in order, parallel approvers joined by "+", e.g. A → B + C (1 of 2)."""
+        users = self.env["res.users"].sudo().browse(
+            {step[0] for rec in self for step in rec.route or []}
+        )
+        names = {user.id: user.name for user in users}
+        for rec in self:
+            stages = {}  # stage -> ([step names], quorum), in route order
+            for number, step in enumerate(rec.route or [], 1):
+                stage = step[2] if len(step) > 2 else number
+                quorum = step[3] if len(step) > 3 else 1
+                stages.setdefault(stage, ([], quorum))[0].append(step[1] or names.get(step[0], ""))
+            rec.route_summary = " → ".join(
+                " + ".join(step_names) + (f" ({quorum} of {len(step_names)})" if quorum < len(step_names) else "")
+                for step_names, quorum in stages.values()
+            )
+
+    def write(self, vals):
+        raise UserError(_("Rule versions are immutable."))
+
+    def _signature(self):
+        """Comparable content of a version (see kh.approval.rule._compile_route)."""
+        self.ensure_one()
+        return (
+            tuple(tuple(step) for step in self.route or []),
+            self.company_id.id, self.department_id.id, self.min_amount, self.currency_id.id,
+        )
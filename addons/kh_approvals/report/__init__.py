@@ -0,0 +1 @@
+from . import cycle_stats
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models
+
+
+# ============================================================================
+# Approval Cycle-Time Statistics (materialized SQL view)
+# ============================================================================
+class KhApprovalCycleStats(models.Model):
+    """
+    Queue lengths and decision/cycle times per approver, department and rule.
+    Built from kh.approval.line pending_since/decided_on (no chatter tables) and
+    materialized, refreshed by cron (see _cron_refresh).
+    """
+    _name = "kh.approval.cycle.stats"
+    _description = "Approval Cycle-Time Statistics"
+    _auto = False
+    _order = "dimension, company_id, id"
+
+    dimension = fields.Selection(
+        [
+            ("approver", "Approver"),
+            ("department", "Department"),
+            ("rule", "Rule"),
+        ],
+        readonly=True,
+    )
+    company_id = fields.Many2one("res.company", readonly=True)
+    approver_id = fields.Many2one("res.users", string="Approver", readonly=True)
+    department_id = fields.Many2one("kh.approvals.department", string="Department", readonly=True)
+    rule_id = fields.Many2one("kh.approval.rule", string="Rule", readonly=True)
+
+    queue_count = fields.Integer(string="Queue Length", readonly=True)
+    decided_count = fields.Integer(string="Decisions", readonly=True)
+    median_decision_hours = fields.Float(string="Median Time to Decision (h)", readonly=True, aggregator="avg")
+    p90_decision_hours = fields.Float(string="P90 Time to Decision (h)", readonly=True, aggregator="avg")
+    closed_count = fields.Integer(string="Closed Requests", readonly=True)
+    median_cycle_hours = fields.Float(string="Median Cycle Time (h)", readonly=True, aggregator="avg")
+    p90_cycle_hours = fields.Float(string="P90 Cycle Time (h)", readonly=True, aggregator="avg")
+
+    def _query(self):
+        return """
+            WITH lines AS (
+                SELECT l.approver_id, r.company_id, r.department_id, r.rule_id,
+                       (r.state = 'in_review' AND l.state = 'pending' AND l.stage = r.current_stage) AS is_current,
+                       EXTRACT(EPOCH FROM (l.decided_on - l.pending_since)) / 3600.0 AS decision_hours
+                  FROM kh_approval_line l
+                  JOIN kh_approval_request r ON r.id = l.request_id
+                 WHERE r.state != 'draft'
+            ),
+            cycles AS (
+                SELECT r.company_id, r.department_id, r.rule_id,
+                       EXTRACT(EPOCH FROM (MAX(l.decided_on) - r.submitted_on)) / 3600.0 AS cycle_hours
+                  FROM kh_approval_request r
+                  JOIN kh_approval_line l ON l.request_id = r.id
+                 WHERE r.state IN ('approved', 'rejected')
+                   AND r.submitted_on IS NOT NULL
+                   AND l.decided_on IS NOT NULL
+              GROUP BY r.id
+            ),
+            line_stats AS (
+                SELECT CASE WHEN GROUPING(approver_id) = 0 THEN 'approver'
+                            WHEN GROUPING(department_id) = 0 THEN 'department'
+                            ELSE 'rule' END AS dimension,
+                       company_id,
+                       CASE WHEN GROUPING(approver_id) = 0 THEN approver_id END AS approver_id,
+                       CASE WHEN GROUPING(department_id) = 0 THEN department_id END AS department_id,
+                       CASE WHEN GROUPING(rule_id) = 0 THEN rule_id END AS rule_id,
+                       COUNT(*) FILTER (WHERE is_current) AS queue_count,
+                       COUNT(decision_hours) AS decided_count,
+                       percentile_cont(0.5) WITHIN GROUP (ORDER BY decision_hours) AS median_decision_hours,
+                       percentile_cont(0.9) WITHIN GROUP (ORDER BY decision_hours) AS p90_decision_hours
+                  FROM lines
+              GROUP BY GROUPING SETS (
+                       (company_id, approver_id),
+                       (company_id, department_id),
+                       (company_id, rule_id)
+                   )
+            ),
+            cycle_stats AS (
+                SELECT CASE WHEN GROUPING(department_id) = 0 THEN 'department' ELSE 'rule' END AS dimension,
+                       company_id,
+                       CASE WHEN GROUPING(department_id) = 0 THEN department_id END AS department_id,
+                       CASE WHEN GROUPING(rule_id) = 0 THEN rule_id END AS rule_id,
+                       COUNT(*) AS closed_count,
+                       percentile_cont(0.5) WITHIN GROUP (ORDER BY cycle_hours) AS median_cycle_hours,
+                       percentile_cont(0.9) WITHIN GROUP (ORDER BY cycle_hours) AS p90_cycle_hours
+                  FROM cycles
+              GROUP BY GROUPING SETS (
+                       (company_id, department_id),
+                       (company_id, rule_id)
+                   )
+            )
+            SELECT ROW_NUMBER() OVER (
+                       ORDER BY ls.dimension, ls.company_id, ls.approver_id, ls.department_id, ls.rule_id
+                   ) AS id,
+                   ls.dimension, ls.company_id, ls.approver_id, ls.department_id, ls.rule_id,
+                   ls.queue_count, ls.decided_count, ls.median_decision_hours, ls.p90_decision_hours,
+                   COALESCE(cs.closed_count, 0) AS closed_count,
+                   cs.median_cycle_hours, cs.p90_cycle_hours
+              FROM line_stats ls
+         LEFT JOIN cycle_stats cs
+                ON cs.dimension = ls.dimension
+               AND cs.company_id IS NOT DISTINCT FROM ls.company_id
+               AND cs.department_id IS NOT DISTINCT FROM ls.department_id
+               AND cs.rule_id IS NOT DISTINCT FROM ls.rule_id
+        """
+
+    def init(self):
+        cr = self.env.cr
+        cr.execute(f"DROP VIEW IF EXISTS {self._table} CASCADE")
+        cr.execute(f"DROP MATERIALIZED VIEW IF EXISTS {self._table} CASCADE")
+        cr.execute(f"CREATE MATERIALIZED VIEW {self._table} AS ({self._query()})")
+        # Unique index: required by REFRESH ... CONCURRENTLY
+        cr.execute(f"CREATE UNIQUE INDEX {self._table}_id_idx ON {self._table} (id)")
+        cr.execute(f"CREATE INDEX {self._table}_dimension_idx ON {self._table} (dimension, company_id)")
+
+    @api.model
+    def _cron_refresh(self):
+        """Refresh the statistics without blocking readers."""
+        self.env.cr.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {self._table}")
+        return True
@@ -0,0 +1,11 @@
+from . import test_activity_guard
+from . import test_archive
+from . import test_counters
+from . import test_cycle_stats
+from . import test_decisions
+from . import test_export
+from . import test_ingest
+from . import test_notifications
+from . import test_perf
+from . import test_requests
+from . import test_rules
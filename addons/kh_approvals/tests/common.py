@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase, new_test_user
+
+
+class KhApprovalsCase(TransactionCase):
+    """Two companies, a requester, two approvers, a manager and a two-step rule."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        env = cls.env
+        cls.company = env["res.company"].create({"name": "KH Test Co"})
+        cls.other_company = env["res.company"].create({"name": "KH Test Other Co"})
+        companies = cls.company | cls.other_company
+
+        def user(login, groups="base.group_user"):
+            return new_test_user(
+                env, login=login, groups=groups,
+                company_id=cls.company.id, company_ids=[(6, 0, companies.ids)],
+            )
+
+        cls.requester = user("kh_test_requester")
+        cls.approver_1 = user("kh_test_approver_1")
+        cls.approver_2 = user("kh_test_approver_2")
+        cls.manager = user("kh_test_manager", "base.group_user,kh_approvals.group_kh_approvals_manager")
+
+        Department = env["kh.approvals.department"]
+        cls.department = Department.create({"name": "KH Test Finance", "company_id": cls.company.id})
+        cls.other_department = Department.create({"name": "KH Test Ops", "company_id": cls.other_company.id})
+
+        # Noise rules so resolution has something to choose from
+        Rule = env["kh.approval.rule"]
+        Rule.create([
+            {
+                "name": f"KH Test Noise {i}",
+                "company_id": cls.other_company.id,
+                "department_id": cls.other_department.id,
+                "step_ids": [(0, 0, {"sequence": 10, "approver_id": cls.approver_1.id})],
+            }
+            for i in range(20)
+        ])
+        cls.rule = Rule.create({
+            "name": "KH Test Two Steps",
+            "company_id": cls.company.id,
+            "department_id": cls.department.id,
+            "step_ids": [
+                (0, 0, {"sequence": 10, "name": "Manager", "approver_id": cls.approver_1.id}),
+                (0, 0, {"sequence": 20, "name": "Finance", "approver_id": cls.approver_2.id}),
+            ],
+        })
+
+    def _request_vals(self, size, tag):
+        # No rule_id: routed by the rule resolution engine
+        return [{
+            "title": f"KH Test {tag} {i}",
+            "company_id": self.company.id,
+            "department_id": self.department.id,
+            "amount": 100.0 + i,
+            "currency_id": self.company.currency_id.id,
+        } for i in range(size)]
+
+    def _submitted(self, size, tag):
+        requests = self.env["kh.approval.request"].with_user(self.requester).create(self._request_vals(size, tag))
+        requests.action_submit()
+        return requests
+
+    def _parallel_rule(self, name="KH Test Parallel"):
+        """Any-of stage (approver 1 or 2), then the manager."""
+        rule = self.env["kh.approval.rule"].create({
+            "name": name,
+            "company_id": self.company.id,
+            "stage_ids": [(0, 0, {"sequence": 10, "name": "Managers", "quorum": "any"})],
+        })
+        self.env["kh.approval.rule.step"].create([
+            {"rule_id": rule.id, "sequence": 10, "approver_id": user.id, "stage_id": rule.stage_ids.id}
+            for user in (self.approver_1, self.approver_2)
+        ] + [{"rule_id": rule.id, "sequence": 20, "approver_id": self.manager.id}])
+        return rule
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from odoo.exceptions import UserError
+from odoo.tests.common import tagged
+
+from .common import KhApprovalsCase
+
+
+@tagged("post_install", "-at_install")
+class TestActivityGuard(KhApprovalsCase):
+
+    def _partner_activity(self):
+        partner = self.env["res.partner"].create({"name": "KH Test Guarded"})
+        return self.env["mail.activity"].create({
+            "res_model_id": self.env["ir.model"]._get_id("res.partner"),
+            "res_id": partner.id,
+            "activity_type_id": self.env.ref("mail.mail_activity_data_todo").id,
+            "user_id": self.approver_1.id,
+        })
+
+    def test_guard_scope(self):
+        """Every model is guarded by default; admins can narrow the list or exclude models."""
+        ICP = self.env["ir.config_parameter"].sudo()
+        Activity = self.env["mail.activity"]
+        self.assertEqual(Activity._kh_guard_scope(), (None, frozenset()))
+
+        activity = self._partner_activity()
+        with self.assertRaises(UserError):
+            activity.with_user(self.approver_2)._kh_check_permission("write")
+        with self.assertRaises(UserError):
+            activity.with_user(self.approver_2)._kh_check_permission("done")
+        # Managers are never blocked
+        activity.with_user(self.manager)._kh_check_permission("write")
+
+        ICP.set_param("kh_approvals.activity_guard_models", "kh.approval.request, account.move")
+        self.assertEqual(Activity._kh_guard_scope(), (frozenset({"kh.approval.request", "account.move"}), frozenset()))
+        activity.with_user(self.approver_2)._kh_check_permission("write")
+
+        ICP.set_param("kh_approvals.activity_guard_models", "*")
+        ICP.set_param("kh_approvals.activity_guard_exclude_models", "res.partner")
+        self.assertEqual(Activity._kh_guard_scope(), (None, frozenset({"res.partner"})))
+        activity.with_user(self.approver_2)._kh_check_permission("write")
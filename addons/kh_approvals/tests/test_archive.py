@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import tagged
+
+from .common import KhApprovalsCase
+
+
+@tagged("post_install", "-at_install")
+class TestApprovalArchive(KhApprovalsCase):
+
+    def _closed(self, size, tag, days_ago):
+        requests = self._submitted(size, tag)
+        requests.with_user(self.approver_1).action_reject_request()
+        self.assertTrue(all(requests.mapped("closed_on")))
+        self.env.flush_all()
+        self.cr.execute(
+            "UPDATE kh_approval_request SET closed_on = now() - make_interval(days => %s) WHERE id = ANY(%s)",
+            [days_ago, requests.ids],
+        )
+        self.env.invalidate_all()
+        return requests
+
+    def test_archive_off_by_default(self):
+        requests = self._closed(2, "Off", 1000)
+        self.env["kh.approval.request"]._cron_archive()
+        self.assertTrue(all(requests.mapped("active")))
+
+    def test_archive_closed_requests(self):
+        """Requests closed long enough leave the default views, keep their steps and stay findable."""
+        self.env["ir.config_parameter"].sudo().set_param("kh.approval.archive_after_days", 30)
+        Request = self.env["kh.approval.request"].with_user(self.requester)
+        requests = self._closed(3, "Z", 60)
+        recent = self._closed(1, "Y", 10)
+        # Touched recently, but closed long ago: still archived
+        requests.sudo().write({"title": "KH Test Z touched"})
+        self.env["kh.approval.request"]._cron_archive()
+
+        domain = [("id", "in", requests.ids)]
+        self.assertFalse(Request.search_count(domain))
+        self.assertEqual(Request.search_count(domain + [("active", "in", [True, False])]), 3)
+        self.assertTrue(recent.active)
+        self.assertIn(self.approver_1.name, requests[0].sudo().steps_overview_html)
+        # Approvers keep read access through the snapshot
+        self.assertEqual(Request.with_user(self.approver_1).with_context(active_test=False).search_count(domain), 3)
+
+        # The step rows are archived, not dropped: statistics and exports still see them
+        lines = self.env["kh.approval.line"].with_context(active_test=False).search([("request_id", "in", requests.ids)])
+        self.assertEqual(len(lines), 6)
+        self.assertFalse(any(lines.mapped("active")))
+        rows = list(self.env["kh.approval.request"].with_context(active_test=False)._export_history_rows(domain))
+        self.assertEqual(len(rows), 6)
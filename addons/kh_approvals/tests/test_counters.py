@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import tagged
+
+from .common import KhApprovalsCase
+
+
+@tagged("post_install", "-at_install")
+class TestDashboardCounters(KhApprovalsCase):
+
+    def _totals(self):
+        Counter = self.env["kh.approval.counter"]
+        self.env.flush_all()
+        return sorted((row[:-1], round(row[-1], 2)) for row in Counter._totals())
+
+    def assertCountersConsistent(self):
+        """The incrementally maintained totals match a rebuild from the requests."""
+        incremental = self._totals()
+        self.env["kh.approval.counter"]._rebuild()
+        self.assertEqual(incremental, self._totals())
+
+    def test_deltas_match_rebuild(self):
+        Request = self.env["kh.approval.request"].with_user(self.requester)
+        requests = Request.create(self._request_vals(6, "K"))
+        self.assertCountersConsistent()
+
+        requests[0].write({"amount": 250.0})
+        requests[1].write({"department_id": False})
+        self.assertCountersConsistent()
+
+        requests[5].unlink()
+        requests = requests[:5]
+        self.assertCountersConsistent()
+
+        requests.action_submit()
+        self.assertCountersConsistent()
+
+        requests[:3].with_user(self.approver_1).action_approve_request()
+        self.assertCountersConsistent()
+
+        requests[:2].with_user(self.approver_2).action_approve_request()
+        requests[3].with_user(self.approver_1).action_reject_request()
+        self.assertCountersConsistent()
+
+        requests[0].with_user(self.manager).action_mark_as_paid()
+        requests[3].action_revise_request()
+        self.assertCountersConsistent()
+
+        self.env["kh.approval.counter"]._cron_compact()
+        self.assertCountersConsistent()
+
+    def test_dashboard_counts(self):
+        requests = self._submitted(3, "KD")
+        data = self.env["kh.approval.counter"].with_user(self.approver_1)._dashboard_data()
+        self.assertEqual(data["my_queue"]["to_approve"], 3)
+        self.assertNotIn("totals", data)
+
+        requests[0].with_user(self.approver_1).action_approve_request()
+        data = self.env["kh.approval.counter"].with_user(self.manager)._dashboard_data()
+        approvers = {row["id"]: row["count"] for row in data["totals"]["by_approver"]}
+        self.assertEqual(approvers.get(self.approver_1.id), 2)
+        self.assertEqual(approvers.get(self.approver_2.id), 1)
+
+    def test_parallel_stage_counts_each_approver(self):
+        """Every current approver of a parallel stage gets the request; totals count it once."""
+        rule = self._parallel_rule()
+        requests = self.env["kh.approval.request"].with_user(self.requester).create([
+            dict(vals, rule_id=rule.id) for vals in self._request_vals(2, "KP")
+        ])
+        requests.action_submit()
+        self.assertCountersConsistent()
+
+        data = self.env["kh.approval.counter"].with_user(self.manager)._dashboard_data()
+        approvers = {row["id"]: row["count"] for row in data["totals"]["by_approver"]}
+        self.assertEqual(approvers.get(self.approver_1.id), 2)
+        self.assertEqual(approvers.get(self.approver_2.id), 2)
+        self.assertEqual(data["totals"]["by_state"].get("in_review"), 2)
+
+        requests[0].with_user(self.approver_2).action_approve_request()
+        self.assertCountersConsistent()
+        data = self.env["kh.approval.counter"].with_user(self.manager)._dashboard_data()
+        approvers = {row["id"]: row["count"] for row in data["totals"]["by_approver"]}
+        self.assertEqual(approvers.get(self.approver_1.id), 1)
+        self.assertEqual(approvers.get(self.manager.id), 1)
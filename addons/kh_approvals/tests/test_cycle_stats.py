@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+from odoo.tests.common import tagged
+
+from .common import KhApprovalsCase
+
+
+@tagged("post_install", "-at_install")
+class TestCycleStats(KhApprovalsCase):
+
+    BASE = datetime(2024, 1, 1, 8, 0)
+
+    def _stats(self, dimension, **key):
+        Stats = self.env["kh.approval.cycle.stats"]
+        Stats.invalidate_model()
+        domain = [("dimension", "=", dimension)] + [(field, "=", value.id) for field, value in key.items()]
+        return Stats.search(domain)
+
+    def test_figures_and_concurrent_refresh(self):
+        requests = self._submitted(10, "CS")
+        requests.with_user(self.approver_1).action_approve_request()
+        rejected = requests[:4]
+        rejected.with_user(self.approver_2).action_reject_request()
+
+        # Approver 1 took 1..10 hours; approver 2 decided 20 hours after submission
+        self.env.flush_all()
+        first = requests.approval_line_ids.filtered(lambda l: l.approver_id == self.approver_1)
+        for hours, line in enumerate(first.sorted("id"), 1):
+            self.cr.execute(
+                "UPDATE kh_approval_line SET pending_since = %s, decided_on = %s + make_interval(hours => %s)"
+                " WHERE id = %s",
+                [self.BASE, self.BASE, hours, line.id],
+            )
+        self.cr.execute(
+            "UPDATE kh_approval_line SET pending_since = %s + interval '10 hours', decided_on = %s + interval '20 hours'"
+            " WHERE request_id = ANY(%s) AND approver_id = %s",
+            [self.BASE, self.BASE, rejected.ids, self.approver_2.id],
+        )
+        self.cr.execute("UPDATE kh_approval_request SET submitted_on = %s WHERE id = ANY(%s)", [self.BASE, requests.ids])
+        self.env.invalidate_all()
+
+        Stats = self.env["kh.approval.cycle.stats"]
+        Stats._cron_refresh()
+
+        approver_1 = self._stats("approver", approver_id=self.approver_1)
+        self.assertEqual(approver_1.decided_count, 10)
+        self.assertEqual(approver_1.queue_count, 0)
+        self.assertAlmostEqual(approver_1.median_decision_hours, 5.5)
+        self.assertAlmostEqual(approver_1.p90_decision_hours, 9.1)
+
+        approver_2 = self._stats("approver", approver_id=self.approver_2)
+        self.assertEqual(approver_2.queue_count, 6)
+        self.assertEqual(approver_2.decided_count, 4)
+        self.assertAlmostEqual(approver_2.median_decision_hours, 10.0)
+
+        rule = self._stats("rule", rule_id=self.rule)
+        self.assertEqual(rule.closed_count, 4)
+        self.assertAlmostEqual(rule.median_cycle_hours, 20.0)
+        self.assertAlmostEqual(rule.p90_cycle_hours, 20.0)
+
+        # Materialized: stale until the next refresh, which runs concurrently (needs the unique index)
+        requests[4:].with_user(self.approver_2).action_approve_request()
+        self.env.flush_all()
+        self.assertEqual(self._stats("approver", approver_id=self.approver_2).queue_count, 6)
+        self.cr.execute(
+            "SELECT 1 FROM pg_indexes WHERE tablename = %s AND indexname = %s",
+            [Stats._table, f"{Stats._table}_id_idx"],
+        )
+        self.assertTrue(self.cr.fetchone())
+        Stats._cron_refresh()
+        self.assertEqual(self._stats("approver", approver_id=self.approver_2).queue_count, 0)
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+from odoo.exceptions import UserError
+from odoo.tests.common import tagged
+
+from .common import KhApprovalsCase
+
+
+@tagged("post_install", "-at_install")
+class TestApprovalDecisions(KhApprovalsCase):
+
+    def test_parallel_stage_quorum(self):
+        """Any-of stage: both approvers are current, the first approval completes it."""
+        rule = self._parallel_rule()
+        self.assertEqual([step[2:] for step in rule.current_version_id.route], [[1, 1], [1, 1], [2, 1]])
+
+        requests = self.env["kh.approval.request"].with_user(self.requester).create([
+            dict(vals, rule_id=rule.id) for vals in self._request_vals(3, "P")
+        ])
+        requests.action_submit()
+        self.assertEqual(requests[0].current_approver_ids, self.approver_1 | self.approver_2)
+        self.assertEqual(requests.with_user(self.approver_2).search_count([("id", "in", requests.ids)]), 3)
+
+        requests.with_user(self.approver_2).action_approve_request()
+        self.assertEqual(requests.current_approver_ids, self.manager)
+        self.assertEqual(
+            set(requests.approval_line_ids.filtered(lambda l: l.approver_id == self.approver_1).mapped("state")),
+            {"skipped"},
+        )
+        self.assertFalse(requests.activity_ids.filtered(lambda a: a.user_id == self.approver_1))
+
+    def test_parallel_stage_reject(self):
+        """All-of stage: one rejection rejects the request and closes the other approvers' steps and To-Dos."""
+        rule = self._parallel_rule()
+        rule.stage_ids.quorum = "all"
+        requests = self.env["kh.approval.request"].with_user(self.requester).create([
+            dict(vals, rule_id=rule.id) for vals in self._request_vals(3, "PR")
+        ])
+        requests.action_submit()
+        self.assertEqual(len(requests.activity_ids.filtered(lambda a: a.user_id == self.approver_2)), 3)
+
+        requests.with_user(self.approver_1).action_reject_request()
+        self.assertEqual(set(requests.mapped("state")), {"rejected"})
+        lines = requests.approval_line_ids
+        self.assertEqual(set(lines.filtered(lambda l: l.approver_id == self.approver_2).mapped("state")), {"skipped"})
+        self.assertFalse(lines.filtered(lambda l: l.approver_id == self.approver_2).mapped("decided_on"))
+        self.assertFalse(requests.activity_ids.filtered(lambda a: a.user_id in self.approver_1 | self.approver_2))
+
+    def test_decision_locked_and_idempotent(self):
+        """A repeated approve/reject is a no-op with a clean result; strangers are still refused."""
+        requests = self._submitted(10, "L")
+        as_approver_1 = requests.with_user(self.approver_1)
+
+        self.assertIs(as_approver_1[:5].action_approve_request(), True)
+        self.env.flush_all()
+        self.env.invalidate_all()
+        queries = self.cr.sql_log_count
+        result = as_approver_1[:5].action_approve_request()
+        self.env.flush_all()
+        # Only the lock and the reads: nothing written, nothing notified
+        self.assertLessEqual(self.cr.sql_log_count - queries, 15)
+        self.assertEqual(result["tag"], "display_notification")
+        self.assertEqual(requests[:5].current_approver_id, self.approver_2)
+        self.assertEqual(len(requests[:5].approval_line_ids.filtered(lambda l: l.state == "approved")), 5)
+
+        # Mixed batch: the new ones are decided, the old ones left alone
+        result = as_approver_1.action_reject_request()
+        self.assertEqual(result["tag"], "display_notification")
+        self.assertEqual(set(requests[5:].mapped("state")), {"rejected"})
+        self.assertEqual(set(requests[:5].mapped("state")), {"in_review"})
+
+        with self.assertRaises(UserError):
+            requests[:5].with_user(self.manager).action_approve_request()
+
+    def test_record_rule_own_requests(self):
+        """A regular approver only sees the requests routed to them."""
+        noise_rule = self.env["kh.approval.rule"].create({
+            "name": "KH Test Noise Route",
+            "company_id": self.company.id,
+            "step_ids": [(0, 0, {"sequence": 10, "approver_id": self.manager.id})],
+        })
+        mine = self._submitted(5, "M")
+        noise = self.env["kh.approval.request"].with_user(self.requester).create([
+            dict(vals, rule_id=noise_rule.id) for vals in self._request_vals(5, "N")
+        ])
+        noise.action_submit()
+        self.assertEqual(self.env["kh.approval.request"].with_user(self.approver_1).search([]), mine)
+
+    def test_bulk_decide_partial(self):
+        """Requests the user cannot decide are reported; the others are still decided."""
+        requests = self._submitted(4, "B")
+        decided = requests[0]
+        decided.with_user(self.approver_1).action_approve_request()
+        draft = self.env["kh.approval.request"].with_user(self.requester).create(self._request_vals(1, "BD"))
+        others = requests[1:]
+        selection = (requests | draft).with_user(self.approver_1)
+
+        results = selection._bulk_decide("approve", note="KH bulk")
+        self.assertEqual(set(results), set((requests | draft).ids))
+        skipped = {rid for rid, error in results.items() if error}
+        self.assertEqual(skipped, {decided.id, draft.id})
+        self.assertEqual(others.current_approver_id, self.approver_2)
+        self.assertEqual(set(others.approval_line_ids.filtered(lambda l: l.approver_id == self.approver_1).mapped("note")), {"KH bulk"})
+        self.assertEqual(decided.current_approver_id, self.approver_2)
+        self.assertEqual(draft.state, "draft")
+
+        # Through the wizard, with one request already rejected
+        decided.with_user(self.approver_2).action_reject_request()
+        wizard = self.env["kh.approval.bulk.decision"].with_user(self.approver_2).create({
+            "request_ids": [(6, 0, requests.ids)],
+            "decision": "reject",
+        })
+        action = wizard.action_confirm()
+        self.assertEqual(action["params"]["type"], "warning")
+        self.assertIn("3 of 4", action["params"]["message"])
+        self.assertIn(decided.name, action["params"]["message"])
+        self.assertEqual(set(requests.mapped("state")), {"rejected"})
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import tagged
+
+from .common import KhApprovalsCase
+
+
+@tagged("post_install", "-at_install")
+class TestApprovalExport(KhApprovalsCase):
+
+    def test_export_history_rows(self):
+        """One row per step, with the header's columns."""
+        Request = self.env["kh.approval.request"].with_user(self.requester)
+        self._submitted(3, "X")
+        rows = list(Request._export_history_rows([("title", "=like", "KH Test X %")], chunk_size=2))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual({len(row) for row in rows}, {len(Request._export_history_header())})
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import tagged
+
+from .common import KhApprovalsCase
+
+
+@tagged("post_install", "-at_install")
+class TestApprovalIngest(KhApprovalsCase):
+
+    def test_ingest_idempotent_and_isolated(self):
+        """Ingestion creates a chunk, isolates bad items and never creates a key twice."""
+        Request = self.env["kh.approval.request"].with_user(self.requester)
+        items = [
+            dict(vals, idempotency_key=f"kh-test-{i}")
+            for i, vals in enumerate(self._request_vals(20, "I"))
+        ]
+        results = Request._ingest(items, submit=True)
+        self.assertEqual({r["status"] for r in results}, {"created"})
+        self.assertEqual({r["state"] for r in results}, {"in_review"})
+
+        replay = Request._ingest(items[:5] + [{"idempotency_key": "kh-test-bad", "title": "Bad", "amount": "x"}])
+        self.assertEqual([r["status"] for r in replay], ["exists"] * 5 + ["error"])
+        self.assertEqual(Request.search_count([("ingest_key", "=like", "kh-test-%")]), 20)
+
+    def test_ingest_retry_keeps_names_unique(self):
+        """After a failed chunk, items retried one by one get fresh numbers."""
+        self.env.ref("kh_approvals.seq_kh_approval_request").implementation = "no_gap"
+        empty_rule = self.env["kh.approval.rule"].create({"name": "KH Test No Steps", "company_id": self.company.id})
+        Request = self.env["kh.approval.request"].with_user(self.requester)
+        items = [
+            dict(vals, idempotency_key=f"kh-test-mixed-{i}")
+            for i, vals in enumerate(self._request_vals(4, "MX"))
+        ]
+        # Passes validation, fails on submit: the whole chunk is rolled back and retried
+        items[2]["rule_id"] = empty_rule.id
+        results = Request._ingest(items, submit=True)
+        self.assertEqual([r["status"] for r in results], ["created", "created", "error", "created"])
+
+        created = Request.browse([r["id"] for r in results if r["status"] == "created"])
+        later = Request.create(self._request_vals(3, "MY"))
+        names = (created | later).mapped("name")
+        self.assertEqual(len(set(names)), 6)
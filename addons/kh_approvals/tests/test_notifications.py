@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+from odoo import fields
+from odoo.tests.common import tagged
+
+from .common import KhApprovalsCase
+
+
+@tagged("post_install", "-at_install")
+class TestApprovalNotifications(KhApprovalsCase):
+
+    def _todos(self, requests, user):
+        return self.env["mail.activity"].sudo().search([
+            ("res_model", "=", "kh.approval.request"), ("res_id", "in", requests.ids), ("user_id", "=", user.id),
+        ])
+
+    def test_todo_not_throttled(self):
+        """A To-Do is created whenever the approver has none open, even within the throttle window."""
+        # Revise and resubmit: the rejection closed the To-Do, the resubmission needs a new one
+        request = self._submitted(1, "T")
+        self.assertEqual(len(self._todos(request, self.approver_1)), 1)
+        request.with_user(self.approver_1).action_reject_request()
+        self.assertFalse(self._todos(request, self.approver_1))
+        request.action_revise_request()
+        request.action_submit()
+        self.assertEqual(len(self._todos(request, self.approver_1)), 1)
+
+        # Same approver on two consecutive steps
+        rule = self.env["kh.approval.rule"].create({
+            "name": "KH Test Twice",
+            "company_id": self.company.id,
+            "step_ids": [
+                (0, 0, {"sequence": 10, "approver_id": self.approver_1.id}),
+                (0, 0, {"sequence": 20, "approver_id": self.approver_1.id}),
+            ],
+        })
+        request = self.env["kh.approval.request"].with_user(self.requester).create(
+            dict(self._request_vals(1, "T2")[0], rule_id=rule.id)
+        )
+        request.action_submit()
+        request.with_user(self.approver_1).action_approve_request()
+        self.assertEqual(request.state, "in_review")
+        self.assertEqual(len(self._todos(request, self.approver_1)), 1)
+
+    def test_digest_mode_one_activity_per_user(self):
+        """Digest mode keeps one activity per approver however long their queue is."""
+        self.env["ir.config_parameter"].sudo().set_param("kh.approval.activity_mode", "digest")
+        Activity = self.env["mail.activity"].sudo()
+        requests = self._submitted(20, "G")
+
+        digest = self.env["kh.approval.digest"].sudo().search(
+            [("user_id", "=", self.approver_1.id), ("kind", "=", "approval")]
+        )
+        self.assertGreaterEqual(digest.request_count, 20)
+        self.assertEqual(len(digest.activity_ids), 1)
+        self.assertFalse(Activity.search_count([
+            ("res_model", "=", "kh.approval.request"), ("res_id", "in", requests.ids),
+        ]))
+
+        before = digest.request_count
+        requests[:10].with_user(self.approver_1).action_approve_request()
+        self.assertEqual(digest.request_count, before - 10)
+        self.assertEqual(len(digest.activity_ids), 1)
+
+    def test_overdue_reminder_and_escalation(self):
+        """Overdue steps get one reminder, then move to the backup approver; reruns are no-ops."""
+        self.rule.write({"reminder_hours": 1, "escalation_hours": 4, "backup_approver_id": self.manager.id})
+        NotifyLog = self.env["kh.approval.notify.log"]
+        Request = self.env["kh.approval.request"]
+        requests = self._submitted(3, "O")
+        lines = requests.sudo().approval_line_ids.filtered(lambda l: l.approver_id == self.approver_1)
+
+        def age(hours):
+            self.env.flush_all()
+            self.cr.execute(
+                "UPDATE kh_approval_line SET pending_since = now() at time zone 'UTC' - make_interval(hours => %s)"
+                " WHERE id = ANY(%s)",
+                [hours, lines.ids],
+            )
+            self.env.invalidate_all()
+
+        age(2)
+        Request._cron_overdue(batch_size=2)
+        Request._cron_overdue(batch_size=2)
+        self.assertEqual(lines.mapped("reminder_count"), [1, 1, 1])
+        self.assertEqual(NotifyLog.search_count([("request_id", "in", requests.ids), ("kind", "=", "reminder")]), 3)
+
+        age(5)
+        Request._cron_overdue()
+        Request._cron_overdue()
+        self.assertEqual(lines.approver_id, self.manager)
+        self.assertEqual(lines.escalated_from_id, self.approver_1)
+        self.assertEqual(requests.current_approver_id, self.manager)
+        self.assertFalse(lines.filtered(lambda l: l.reminder_count))
+        # The original approver can still open the request
+        self.assertEqual(Request.with_user(self.approver_1).search_count([("id", "in", requests.ids)]), 3)
+        # The real waiting time is kept
+        self.assertTrue(all(
+            line.pending_since <= fields.Datetime.subtract(line.escalated_on, hours=4) for line in lines
+        ))
+
+        # Still pending escalation_hours after the escalation: escalated again (the backup is
+        # now the approver, so the managers are alerted)
+        self.assertFalse(NotifyLog.search_count([("request_id", "in", requests.ids), ("kind", "=", "escalation")]))
+        self.env.flush_all()
+        self.cr.execute(
+            "UPDATE kh_approval_line SET escalated_on = escalated_on - interval '5 hours' WHERE id = ANY(%s)",
+            [lines.ids],
+        )
+        self.env.invalidate_all()
+        Request._cron_overdue()
+        self.assertEqual(lines.approver_id, self.manager)
+        self.assertEqual(NotifyLog.search_count([("request_id", "in", requests.ids), ("kind", "=", "escalation")]), 3)
+
+    def test_deferred_notifications_outbox(self):
+        """In deferred mode, transitions queue their notifications and the cron sends them."""
+        self.env["ir.config_parameter"].sudo().set_param("kh.approval.notification_mode", "deferred")
+        request = self._submitted(1, "D")
+        request.sudo().message_subscribe(partner_ids=self.env["res.partner"].create({"name": "KH Test Follower"}).ids)
+        request.with_user(self.approver_1).action_reject_request()
+
+        Outbox = self.env["kh.approval.outbox"]
+        self.assertTrue(Outbox.search_count([("state", "=", "pending")]))
+        Outbox._cron_process()
+        self.assertFalse(Outbox.search_count([("state", "=", "pending")]))
+
+    def test_outbox_dedupe_per_transition(self):
+        """A double enqueue is merged; the same intent from a later transition is kept."""
+        self.env["ir.config_parameter"].sudo().set_param("kh.approval.notification_mode", "deferred")
+        Outbox = self.env["kh.approval.outbox"]
+        request = self._submitted(1, "DD")
+
+        def pending():
+            return Outbox.search_count([
+                ("request_id", "=", request.id), ("method", "=", "_notify_first_pending"), ("state", "=", "pending"),
+            ])
+
+        self.assertEqual(pending(), 1)
+        Outbox._enqueue("_notify_first_pending", [(request, {})])
+        self.assertEqual(pending(), 1)
+
+        # Revise and resubmit before the cron ran: the approver must be notified again
+        request.with_user(self.approver_1).action_reject_request()
+        request.action_revise_request()
+        request.action_submit()
+        self.assertEqual(pending(), 2)
+        Outbox._cron_process()
+        self.assertFalse(pending())
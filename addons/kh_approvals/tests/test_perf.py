@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+Query-count and wall-time budgets for the request lifecycle.
+
+Run with:  odoo-bin -d <db> -i kh_approvals --test-tags kh_perf
+Each measure is logged as a "kh_perf {json}" line and, when the
+KH_PERF_RESULTS environment variable is set, appended to that file as JSON
+lines. Wall-time budgets are multiplied by KH_PERF_TIME_TOLERANCE (default 5)
+since runners differ in speed; set it to 0 to skip the wall-time checks.
+"""
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from odoo import fields
+from odoo.tests.common import tagged
+
+from .common import KhApprovalsCase
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged("post_install", "-at_install", "-standard", "kh_perf")
+class TestApprovalPerformance(KhApprovalsCase):
+    SIZES = (1, 10, 1000)
+
+    # Max SQL queries per record beyond the first. Chatter and counters are
+    # batched; what is left per record is the mail.activity create (follower
+    # check of the assignee) and, where noted, one message_notify per request.
+    BUDGETS = {
+        "create": 1,
+        "action_submit": 4,  # approver's To-Do
+        "search_to_approve": 0,
+        "form_read": 0.05,
+        "action_approve_request": 4,  # next approver's To-Do
+        "action_approve_request_final": 10,  # payment To-Do + requester notification
+        "action_mark_as_paid": 4,  # payment To-Do
+        "action_reject_request": 7,  # requester notification
+        "action_revise_request": 7,  # per-request summary note (revision, closed To-Dos)
+    }
+    # Max wall time (seconds) per record beyond the first, before KH_PERF_TIME_TOLERANCE.
+    SECONDS = {
+        "create": 0.002,
+        "action_submit": 0.01,
+        "search_to_approve": 0.0002,
+        "form_read": 0.0005,
+        "action_approve_request": 0.01,
+        "action_approve_request_final": 0.02,
+        "action_mark_as_paid": 0.01,
+        "action_reject_request": 0.015,
+        "action_revise_request": 0.015,
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.results = []
+
+    @classmethod
+    def tearDownClass(cls):
+        path = os.environ.get("KH_PERF_RESULTS")
+        if path and cls.results:
+            with open(path, "a", encoding="utf-8") as f:
+                for row in cls.results:
+                    f.write(json.dumps(row) + "\n")
+        super().tearDownClass()
+
+    # -------------------------------------------------------------------------
+    # Helpers
+    # -------------------------------------------------------------------------
+    @contextmanager
+    def _measure(self, operation, size):
+        """Count SQL queries and wall time of the block (flushed, cold cache)."""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        row = {"operation": operation, "size": size}
+        queries = self.cr.sql_log_count
+        start = time.perf_counter()
+        yield row
+        self.env.flush_all()
+        row.update(
+            queries=self.cr.sql_log_count - queries,
+            seconds=round(time.perf_counter() - start, 4),
+            date=fields.Datetime.to_string(fields.Datetime.now()),
+        )
+        self.results.append(row)
+        _logger.info("kh_perf %s", json.dumps(row))
+
+    def _assert_scales(self, operation, sizes, budget, prepare, seconds=None):
+        """Measure ``prepare(size)()`` for each size and check the cost per extra record.
+
+        ``prepare`` builds the data for one size outside the measure and
+        returns the callable to measure; ``budget`` is the max number of
+        queries per record beyond the smallest size (0: flat) and ``seconds``
+        the optional max wall time per such record (see KH_PERF_TIME_TOLERANCE).
+        """
+        tolerance = float(os.environ.get("KH_PERF_TIME_TOLERANCE", 5))
+        rows = {}
+        for size in sizes:
+            run = prepare(size)
+            with self._measure(operation, size) as rows[size]:
+                run()
+        base = rows[sizes[0]]
+        for size in sizes[1:]:
+            extra = size - sizes[0]
+            per_record = (rows[size]["queries"] - base["queries"]) / extra
+            with self.subTest(operation=operation, size=size):
+                self.assertLessEqual(
+                    per_record, budget,
+                    f"{operation}: {per_record:.2f} queries per extra record (budget {budget}) at size {size}",
+                )
+                if seconds and tolerance:
+                    per_record_time = (rows[size]["seconds"] - base["seconds"]) / extra
+                    self.assertLessEqual(
+                        per_record_time, seconds * tolerance,
+                        f"{operation}: {per_record_time:.4f}s per extra record "
+                        f"(budget {seconds}s x{tolerance:g}) at size {size}",
+                    )
+        return rows
+
+    # -------------------------------------------------------------------------
+    # Lifecycle steps, one per budget: data for `size` records -> callable to measure
+    # -------------------------------------------------------------------------
+    def _prepare_create(self, size):
+        Request = self.env["kh.approval.request"].with_user(self.requester)
+        vals_list = self._request_vals(size, f"create{size}")
+        return lambda: Request.create(vals_list)
+
+    def _prepare_action_submit(self, size):
+        Request = self.env["kh.approval.request"].with_user(self.requester)
+        return Request.create(self._request_vals(size, f"submit{size}")).action_submit
+
+    def _prepare_search_to_approve(self, size):
+        self._submitted(size, f"search{size}")
+        as_approver_1 = self.env["kh.approval.request"].with_user(self.approver_1)
+        return lambda: as_approver_1.search([("current_approver_ids", "in", [self.approver_1.id])])
+
+    def _prepare_form_read(self, size):
+        requests = self._submitted(size, f"read{size}").with_user(self.approver_1)
+        return lambda: requests.read(
+            ["name", "title", "state", "amount", "current_approver_id", "steps_overview_html"]
+        )
+
+    def _prepare_action_approve_request(self, size):
+        return self._submitted(size, f"approve{size}").with_user(self.approver_1).action_approve_request
+
+    def _prepare_action_approve_request_final(self, size):
+        requests = self._submitted(size, f"final{size}")
+        requests.with_user(self.approver_1).action_approve_request()
+        return requests.with_user(self.approver_2).action_approve_request
+
+    def _prepare_action_mark_as_paid(self, size):
+        requests = self._submitted(size, f"paid{size}")
+        requests.with_user(self.approver_1).action_approve_request()
+        requests.with_user(self.approver_2).action_approve_request()
+        return requests.with_user(self.manager).action_mark_as_paid
+
+    def _prepare_action_reject_request(self, size):
+        return self._submitted(size, f"reject{size}").with_user(self.approver_1).action_reject_request
+
+    def _prepare_action_revise_request(self, size):
+        requests = self._submitted(size, f"revise{size}")
+        requests.with_user(self.approver_1).action_reject_request()
+        return requests.action_revise_request
+
+    # -------------------------------------------------------------------------
+    # Tests
+    # -------------------------------------------------------------------------
+    def test_lifecycle_budgets(self):
+        for operation, budget in self.BUDGETS.items():
+            self._assert_scales(
+                operation, self.SIZES, budget, getattr(self, f"_prepare_{operation}"), self.SECONDS[operation]
+            )
+
+    def test_reserve_names_flat(self):
+        Request = self.env["kh.approval.request"]
+        self._assert_scales("reserve_names", (1, 200), 0, lambda size: lambda: Request._reserve_names(self.company.id, size))
+
+    def test_ingest_budget(self):
+        Request = self.env["kh.approval.request"].with_user(self.requester)
+
+        def prepare(size):
+            items = [
+                dict(vals, idempotency_key=f"kh-perf-{size}-{i}")
+                for i, vals in enumerate(self._request_vals(size, f"ingest{size}"))
+            ]
+            return lambda: Request._ingest(items, submit=True)
+
+        budget = self.BUDGETS["create"] + self.BUDGETS["action_submit"]
+        self._assert_scales("ingest", (1, 100), budget, prepare)
+
+    def test_export_history_flat(self):
+        Request = self.env["kh.approval.request"].with_user(self.requester)
+
+        def prepare(size):
+            self._submitted(size, f"export{size}")
+            domain = [("title", "=like", f"KH Test export{size} %")]
+            return lambda: list(Request._export_history_rows(domain))
+
+        self._assert_scales("export_history", (1, 100), 0, prepare)
+
+    def test_approve_parallel_budget(self):
+        rule = self._parallel_rule()
+        Request = self.env["kh.approval.request"].with_user(self.requester)
+
+        def prepare(size):
+            requests = Request.create([
+                dict(vals, rule_id=rule.id) for vals in self._request_vals(size, f"parallel{size}")
+            ])
+            requests.action_submit()
+            return requests.with_user(self.approver_2).action_approve_request
+
+        self._assert_scales("approve_parallel", (1, 100), self.BUDGETS["action_approve_request"], prepare)
+
+    def test_archive_budget(self):
+        self.env["ir.config_parameter"].sudo().set_param("kh.approval.archive_after_days", 30)
+        Request = self.env["kh.approval.request"]
+
+        def prepare(size):
+            requests = self._submitted(size, f"archive{size}")
+            requests.with_user(self.approver_1).action_reject_request()
+            self.env.flush_all()
+            self.cr.execute(
+                "UPDATE kh_approval_request SET closed_on = now() - interval '60 days' WHERE id = ANY(%s)",
+                [requests.ids],
+            )
+            return Request._cron_archive
+
+        self._assert_scales("archive", (1, 100), 10, prepare)
+
+    def test_deferred_reject_flat_in_followers(self):
+        self.env["ir.config_parameter"].sudo().set_param("kh.approval.notification_mode", "deferred")
+        followers = self.env["res.partner"].create([{"name": f"KH Perf Follower {i}"} for i in range(20)])
+
+        def prepare(size):
+            request = self._submitted(1, f"deferred{size}")
+            request.sudo().message_subscribe(partner_ids=followers[:size].ids)
+            return request.with_user(self.approver_1).action_reject_request
+
+        self._assert_scales("deferred_reject", (1, 20), 0, prepare)
+
+    def test_record_rule_search_flat(self):
+        """An approver's list/search cost stays flat as other users' requests pile up."""
+        Request = self.env["kh.approval.request"].with_user(self.requester)
+        noise_rule = self.env["kh.approval.rule"].create({
+            "name": "KH Perf Noise Route",
+            "company_id": self.company.id,
+            "step_ids": [(0, 0, {"sequence": 10, "approver_id": self.manager.id})],
+        })
+        self._submitted(20, "mine")
+        as_approver = Request.with_user(self.approver_1)
+        noise = Request
+
+        def grow(size):
+            nonlocal noise
+            if len(noise) < size:
+                more = Request.create([
+                    dict(vals, rule_id=noise_rule.id)
+                    for vals in self._request_vals(size - len(noise), f"noise{size}")
+                ])
+                more.action_submit()
+                noise |= more
+
+        def prepare_search(size):
+            grow(size)
+            return lambda: as_approver.search([], limit=80).read(
+                ["name", "title", "state", "amount", "current_approver_id"]
+            )
+
+        def prepare_count(size):
+            grow(size)
+            return lambda: as_approver.search_count([])
+
+        self._assert_scales("rule_search", (100, 2000), 0, prepare_search)
+        self._assert_scales("rule_search_count", (100, 2000), 0, prepare_count)
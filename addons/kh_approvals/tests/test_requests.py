@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+from odoo import fields
+from odoo.tests.common import tagged
+
+from .common import KhApprovalsCase
+
+
+@tagged("post_install", "-at_install")
+class TestApprovalRequest(KhApprovalsCase):
+
+    def test_lifecycle(self):
+        """Draft -> in review -> approved -> paid, and rejected -> draft on revision."""
+        Request = self.env["kh.approval.request"].with_user(self.requester)
+        requests = Request.create(self._request_vals(3, "A"))
+        self.assertEqual(requests.rule_id, self.rule)
+
+        requests.action_submit()
+        self.assertEqual(set(requests.mapped("state")), {"in_review"})
+        self.assertEqual(
+            Request.with_user(self.approver_1).search([("current_approver_ids", "in", [self.approver_1.id])]),
+            requests,
+        )
+
+        requests.with_user(self.approver_1).action_approve_request()
+        self.assertEqual(requests.current_approver_id, self.approver_2)
+        requests.with_user(self.approver_2).action_approve_request()
+        self.assertEqual(set(requests.mapped("state")), {"approved"})
+        requests.with_user(self.manager).action_mark_as_paid()
+        self.assertEqual(set(requests.mapped("payment_state")), {"paid"})
+
+        rejected = self._submitted(3, "R")
+        rejected.with_user(self.approver_1).action_reject_request()
+        self.assertEqual(set(rejected.mapped("state")), {"rejected"})
+        rejected.action_revise_request()
+        self.assertEqual(set(rejected.mapped("state")), {"draft"})
+
+    def test_batched_submit_approve_query_count(self):
+        """Submitting and approving 20 requests costs about as many queries as one."""
+        # Warm the rule index and the ormcaches
+        warm = self._submitted(1, "QW")
+        warm.with_user(self.approver_1).action_approve_request()
+
+        Request = self.env["kh.approval.request"].with_user(self.requester)
+        one = Request.create(self._request_vals(1, "Q1"))
+        many = Request.create(self._request_vals(20, "Q20"))
+
+        def count(run):
+            self.env.flush_all()
+            before = self.cr.sql_log_count
+            run()
+            self.env.flush_all()
+            return self.cr.sql_log_count - before
+
+        # Chatter, To-Dos and counters are written in one batch whatever the size
+        for action, user in (("action_submit", self.requester), ("action_approve_request", self.approver_1)):
+            one_count = count(getattr(one.with_user(user), action))
+            many_count = count(getattr(many.with_user(user), action))
+            with self.subTest(action=action):
+                self.assertLessEqual(many_count, one_count + 10, f"{action}: {one_count} -> {many_count} queries")
+        self.assertEqual((one | many).current_approver_id, self.approver_2)
+
+    def test_company_currency_amount(self):
+        """Foreign amounts are converted with one rate query per batch, then routed and summed in SQL."""
+        company_currency = self.company.currency_id
+        foreign = self.env.ref("base.EUR")
+        if foreign == company_currency:
+            foreign = self.env.ref("base.USD")
+        foreign.active = True
+        self.env["res.currency.rate"].create({
+            "currency_id": foreign.id, "company_id": self.company.id, "name": "2000-01-01", "rate": 0.5,
+        })
+        expected = foreign._convert(600.0, company_currency, self.company, fields.Date.today())
+        big_rule = self.env["kh.approval.rule"].create({
+            "name": "KH Test Large Amounts",
+            "company_id": self.company.id,
+            "department_id": self.department.id,
+            "min_amount": expected - 1,
+            "currency_id": company_currency.id,
+            "step_ids": [(0, 0, {"sequence": 10, "approver_id": self.manager.id})],
+        })
+        Request = self.env["kh.approval.request"].with_user(self.requester)
+        large = Request.create(dict(self._request_vals(1, "C")[0], amount=600.0, currency_id=foreign.id))
+        self.assertAlmostEqual(large.amount_company_currency, expected)
+        self.assertEqual(large.rule_id, big_rule)
+        large.action_submit()
+
+        requests = Request.create([
+            dict(vals, currency_id=foreign.id) for vals in self._request_vals(100, "CB")
+        ])
+        self.assertEqual(requests.rule_id, self.rule)
+        # Cold rate cache: recomputing the whole batch reads the rates once
+        self.env.flush_all()
+        self.cr.precommit.data.pop("kh_approvals.currency_rates", None)
+        self.env.add_to_compute(requests._fields["amount_company_currency"], requests)
+        queries = self.cr.sql_log_count
+        requests.flush_recordset(["amount_company_currency"])
+        self.assertLessEqual(self.cr.sql_log_count - queries, 5)
+
+        [[total]] = self.env["kh.approval.request"]._read_group(
+            [("id", "in", requests.ids)], [], ["amount_company_currency:sum"]
+        )
+        self.assertAlmostEqual(total, sum(requests.mapped("amount_company_currency")), places=2)
+
+    def test_bulk_create_reserves_names(self):
+        """Numbers for a batch are reserved in one call per company, unique and prefixed."""
+        Request = self.env["kh.approval.request"].with_user(self.requester)
+        names = Request._reserve_names(self.company.id, 200)
+        self.assertEqual(len(set(names)), 200)
+        self.assertTrue(all(name.startswith("APR/") for name in names))
+
+        requests = Request.create(self._request_vals(50, "S"))
+        self.assertEqual(len(set(requests.mapped("name"))), 50)
+        self.assertFalse(set(requests.mapped("name")) & set(names))
+
+    def test_perf_log_sampling(self):
+        """Hot paths log one sample per call at rate 1 and nothing at rate 0."""
+        ICP = self.env["ir.config_parameter"].sudo()
+        PerfLog = self.env["kh.approval.perf.log"].sudo()
+
+        ICP.set_param("kh.approval.perf_sample_rate", 0)
+        self._submitted(5, "P0")
+        self.assertFalse(PerfLog.search_count([]))
+
+        ICP.set_param("kh.approval.perf_sample_rate", 1)
+        self._submitted(5, "P1")
+        sample = PerfLog.search([("operation", "=", "action_submit")])
+        self.assertEqual(len(sample), 1)
+        self.assertEqual(sample.record_count, 5)
+        self.assertEqual(sample.user_id, self.requester)
+        self.assertGreater(sample.query_count, 0)
+        self.assertTrue(PerfLog.search_count([("operation", "=", "_build_approval_lines")]))
+
+        self.cr.execute("UPDATE kh_approval_perf_log SET logged_on = now() - interval '30 days'")
+        PerfLog._cron_purge()
+        self.assertFalse(PerfLog.search_count([]))
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import tagged
+
+from .common import KhApprovalsCase
+
+
+@tagged("post_install", "-at_install")
+class TestApprovalRule(KhApprovalsCase):
+
+    def test_copy_rule_with_parallel_stage(self):
+        """A duplicated rule gets its own stages; the source rule is left as it was."""
+        rule = self._parallel_rule()
+        route = rule.current_version_id.route
+
+        copy = rule.copy()
+        self.assertEqual(len(copy.stage_ids), 1)
+        self.assertNotEqual(copy.stage_ids, rule.stage_ids)
+        self.assertEqual(copy.stage_ids.quorum, "any")
+        self.assertEqual(copy.step_ids.stage_id, copy.stage_ids)
+        self.assertEqual(len(copy.stage_ids.step_ids), 2)
+        self.assertEqual(copy.current_version_id.route, route)
+        # Compiled once, from the remapped stages
+        self.assertEqual(len(copy.version_ids), 1)
+
+        # Editing the copy's stage does not touch the source rule
+        copy.stage_ids.quorum = "all"
+        self.assertEqual(rule.stage_ids.quorum, "any")
+        self.assertEqual(len(rule.stage_ids.step_ids), 2)
+        self.assertEqual(rule.current_version_id.route, route)
+
+    def test_cosmetic_writes_keep_version(self):
+        """Only changes to what the route is built from compile a new version."""
+        rule = self._parallel_rule()
+        version = rule.current_version_id
+        rule.name = "KH Test Parallel (renamed)"
+        rule.stage_ids.name = "Heads"
+        self.assertEqual(rule.current_version_id, version)
+
+        rule.stage_ids.quorum = "all"
+        self.assertNotEqual(rule.current_version_id, version)
+        version = rule.current_version_id
+        rule.step_ids.filtered(lambda s: s.approver_id == self.manager).approver_id = self.approver_1
+        self.assertNotEqual(rule.current_version_id, version)
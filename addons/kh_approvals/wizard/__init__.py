@@ -0,0 +1,2 @@
+from . import bulk_decision
+from . import history_export
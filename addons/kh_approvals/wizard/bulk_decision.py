@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from odoo import Command, api, fields, models, _
+from odoo.exceptions import UserError
+
+
+# ============================================================================
+# Bulk Approve / Reject (wizard)
+# ============================================================================
+class KhApprovalBulkDecision(models.TransientModel):
+    _name = "kh.approval.bulk.decision"
+    _description = "Bulk Approve / Reject Requests"
+
+    request_ids = fields.Many2many("kh.approval.request", string="Requests")
+    decision = fields.Selection(
+        [
+            ("approve", "Approve"),
+            ("reject", "Reject"),
+        ],
+        required=True,
+        default="approve",
+    )
+    note = fields.Char(string="Note", help="Shared note stored on every decided step.")
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        ctx = self.env.context
+        if "request_ids" in fields_list and ctx.get("active_model") == "kh.approval.request":
+            res["request_ids"] = [Command.set(ctx.get("active_ids", []))]
+        return res
+
+    def action_confirm(self):
+        """Decide all selected requests; report per-record failures without rolling back the rest."""
+        self.ensure_one()
+        if not self.request_ids:
+            raise UserError(_("Please select at least one request."))
+
+        results = self.request_ids._bulk_decide(self.decision, note=self.note)
+        failed = {rid: err for rid, err in results.items() if err}
+        done = len(results) - len(failed)
+
+        names = dict(self.request_ids.mapped(lambda r: (r.id, r.name)))
+        message = _("%(done)s of %(total)s request(s) processed.") % {"done": done, "total": len(results)}
+        if failed:
+            message += "\n" + "\n".join(f"{names.get(rid, rid)}: {err}" for rid, err in failed.items())
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Bulk Approve") if self.decision == "approve" else _("Bulk Reject"),
+                "message": message,
+                "type": "warning" if failed else "success",
+                "sticky": bool(failed),
+                "next": {"type": "ir.actions.act_window_close"},
+            },
+        }
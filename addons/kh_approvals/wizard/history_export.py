@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import json
+from urllib.parse import urlencode
+
+from odoo import fields, models
+
+
+# ============================================================================
+# Request History Export (wizard)
+# ============================================================================
+class KhApprovalHistoryExport(models.TransientModel):
+    _name = "kh.approval.history.export"
+    _description = "Export Request History"
+
+    date_from = fields.Date(string="Created From")
+    date_to = fields.Date(string="Created To")
+    state = fields.Selection(
+        [
+            ("draft", "Draft"),
+            ("in_review", "In Review"),
+            ("approved", "Approved"),
+            ("rejected", "Rejected"),
+        ],
+        string="Status",
+        help="Leave empty to export every status.",
+    )
+    include_archived = fields.Boolean(string="Include Archived")
+    file_format = fields.Selection(
+        [
+            ("csv", "CSV"),
+            ("xlsx", "Excel (XLSX)"),
+        ],
+        string="Format",
+        required=True,
+        default="csv",
+    )
+
+    def _get_domain(self):
+        self.ensure_one()
+        domain = []
+        if self.date_from:
+            domain.append(("create_date", ">=", fields.Datetime.to_string(self.date_from)))
+        if self.date_to:
+            domain.append(("create_date", "<", fields.Datetime.to_string(fields.Date.add(self.date_to, days=1))))
+        if self.state:
+            domain.append(("state", "=", self.state))
+        if self.include_archived:
+            domain.append(("active", "in", [True, False]))
+        return domain
+
+    def action_export(self):
+        """Download through the streaming /kh_approvals/export route."""
+        self.ensure_one()
+        query = urlencode({"file_format": self.file_format, "domain": json.dumps(self._get_domain())})
+        return {
+            "type": "ir.actions.act_url",
+            "url": f"/kh_approvals/export?{query}",
+            "target": "self",
+        }